@@ -24,6 +24,14 @@ class ModeOutput:
     def to_bytes_rgb(self) -> list[int]:
         """Convert RGB values to 0-255 bytes."""
         return [max(0, min(255, int(v * 255))) for v in self.values_rgb]
+    
+    def to_bytes_all(self) -> tuple[bytes, bytes, bytes]:
+        """Convert 4ch, 2ch and RGB values to 0-255 bytes in a single pass."""
+        n4 = len(self.values_4ch)
+        n2 = len(self.values_2ch)
+        values = np.array(self.values_4ch + self.values_2ch + self.values_rgb, dtype=np.float64)
+        raw = np.clip(values * 255.0, 0, 255).astype(np.uint8).tobytes()
+        return raw[:n4], raw[n4:n4 + n2], raw[n4 + n2:]
 
 
 class Mode(ABC):
@@ -1,10 +1,12 @@
 """Flet UI for AudioEncoder application."""
 
 import flet as ft
+import flet.canvas as cv
+import logging
 import threading
 import time
 import asyncio
-from typing import Optional
+from typing import Optional, Callable
 import numpy as np
 
 from config.settings import get_settings_manager, AppSettings
@@ -22,6 +24,25 @@ from modes.spectral_mix_mode import SpectralMixMode
 from modes.quad_wave_mode import QuadWaveMode
 from output.udp_sender import UdpSender, FrameBuilder
 
+logger = logging.getLogger(__name__)
+
+# All modes are registered by the imports above, so the registry is static
+_MODE_OPTIONS = tuple(ModeRegistry.list_modes())
+_MODE_NAME_BY_ID = dict(_MODE_OPTIONS)
+
+# Output preview geometry (pixels)
+_PREVIEW_HEIGHT = 100
+_PREVIEW_SPACING = 5
+
+# Delay before a connection field edit is applied (seconds)
+_INPUT_DEBOUNCE = 0.2
+
+# UI refresh cadence (30 Hz) and its debug logging
+_UI_PERIOD = 1.0 / 30
+_DEBUG_EVERY = 30  # ticks, ~1 second
+_DEBUG_FMT = "UI: Level bar updated to %.4f"
+_STATS_FMT = "Packets: {} | FPS: {:.1f} | Errors: {}"
+
 
 class AudioEncoderApp:
     """Main AudioEncoder Flet application."""
@@ -55,6 +76,12 @@ class AudioEncoderApp:
         
         # UI update timer
         self._ui_update_running = False
+        self._ui_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ui_tick_handle: Optional[asyncio.TimerHandle] = None
+        self._ui_next_tick: float = 0.0
+        
+        # Pending debounced text field commits
+        self._debounce_handles: dict[str, asyncio.TimerHandle] = {}
 
         # Pending mode selection (applied via button)
         self._pending_mode_id = self.settings.mode.active_mode
@@ -129,7 +156,7 @@ class AudioEncoderApp:
             width=200,
             options=[
                 ft.dropdown.Option(mode_id, mode_name)
-                for mode_id, mode_name in ModeRegistry.list_modes()
+                for mode_id, mode_name in _MODE_OPTIONS
             ],
             value=self.settings.mode.active_mode
         )
@@ -188,45 +215,21 @@ class AudioEncoderApp:
             on_change=self._on_stream_toggle
         )
         
-        # Output preview
-        self.preview_4ch = [
-            ft.Container(
-                width=40,
-                height=100,
-                bgcolor=ft.Colors.GREY_900,
-                border_radius=5,
-                alignment=ft.alignment.Alignment(0, 1),  # bottom_center
-                content=ft.Container(
-                    width=36,
-                    height=0,
-                    bgcolor=color,
-                    border_radius=3
-                )
-            )
-            for color in [ft.Colors.GREEN_400, ft.Colors.YELLOW_400, 
-                         ft.Colors.BLUE_400, ft.Colors.RED_400]
-        ]
+        # Output preview (one canvas per stream, one bar rect per channel)
+        self.preview_4ch, self._rects_4ch = self._create_preview_canvas(
+            [ft.Colors.GREEN_400, ft.Colors.YELLOW_400,
+             ft.Colors.BLUE_400, ft.Colors.RED_400],
+            bar_width=40
+        )
         self.preview_4ch_labels = [
             ft.Text(label, size=10, color=ft.Colors.GREY_400)
             for label in ["G", "Y", "B", "R"]
         ]
         
-        self.preview_2ch = [
-            ft.Container(
-                width=60,
-                height=100,
-                bgcolor=ft.Colors.GREY_900,
-                border_radius=5,
-                alignment=ft.alignment.Alignment(0, 1),  # bottom_center
-                content=ft.Container(
-                    width=56,
-                    height=0,
-                    bgcolor=color,
-                    border_radius=3
-                )
-            )
-            for color in [ft.Colors.ORANGE_400, ft.Colors.TEAL_400]
-        ]
+        self.preview_2ch, self._rects_2ch = self._create_preview_canvas(
+            [ft.Colors.ORANGE_400, ft.Colors.TEAL_400],
+            bar_width=60
+        )
         self.preview_2ch_labels = [
             ft.Text(label, size=10, color=ft.Colors.GREY_400)
             for label in ["R+Y", "G+B"]
@@ -263,6 +266,36 @@ class AudioEncoderApp:
         # Start audio capture for level bar (always running)
         self._start_audio_capture()
     
+    @staticmethod
+    def _create_preview_canvas(colors: list[str], bar_width: int) -> tuple[cv.Canvas, list[cv.Rect]]:
+        """Create a preview canvas with a background slot and a level bar per channel."""
+        slots: list[cv.Rect] = []
+        bars: list[cv.Rect] = []
+        for i, color in enumerate(colors):
+            x = i * (bar_width + _PREVIEW_SPACING)
+            slots.append(cv.Rect(
+                x=x, y=0, width=bar_width, height=_PREVIEW_HEIGHT, border_radius=5,
+                paint=ft.Paint(color=ft.Colors.GREY_900)
+            ))
+            bars.append(cv.Rect(
+                x=x + 2, y=_PREVIEW_HEIGHT, width=bar_width - 4, height=0, border_radius=3,
+                paint=ft.Paint(color=color)
+            ))
+        canvas = cv.Canvas(
+            shapes=slots + bars,
+            width=len(colors) * (bar_width + _PREVIEW_SPACING) - _PREVIEW_SPACING,
+            height=_PREVIEW_HEIGHT
+        )
+        return canvas, bars
+    
+    @staticmethod
+    def _set_preview_bars(bars: list[cv.Rect], values: list[float]) -> None:
+        """Set bar heights (bottom-aligned) from 0-1 channel values."""
+        for rect, value in zip(bars, values):
+            height = max(2.0, float(value) * 90.0)
+            rect.height = height
+            rect.y = _PREVIEW_HEIGHT - height
+    
     def build(self) -> ft.Control:
         """Build the main UI layout."""
         return ft.Container(
@@ -343,7 +376,7 @@ class AudioEncoderApp:
                             border_radius=10,
                             content=ft.Column([
                                 ft.Text("4ch_v1 Preview", size=12, color=ft.Colors.GREY_400),
-                                ft.Row(self.preview_4ch, spacing=5),
+                                self.preview_4ch,
                                 ft.Row(self.preview_4ch_labels, spacing=15),
                             ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=5)
                         ),
@@ -355,7 +388,7 @@ class AudioEncoderApp:
                             border_radius=10,
                             content=ft.Column([
                                 ft.Text("2ch_v1 Preview", size=12, color=ft.Colors.GREY_400),
-                                ft.Row(self.preview_2ch, spacing=5),
+                                self.preview_2ch,
                                 ft.Row(self.preview_2ch_labels, spacing=25),
                             ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=5)
                         ),
@@ -455,20 +488,44 @@ class AudioEncoderApp:
     
     # Event handlers
     def _on_host_change(self, e):
-        self.settings.connection.host = e.control.value
-        self._sender.host = e.control.value
+        self._debounce("host", self._commit_host, e.control.value)
     
     def _on_port_change(self, e):
+        self._debounce("port", self._commit_port, e.control.value)
+    
+    def _on_fps_change(self, e):
+        self._debounce("fps", self._commit_fps, e.control.value)
+    
+    def _debounce(self, key: str, callback: Callable[[str], None], value: str) -> None:
+        """Run callback(value) once the field has been idle for the debounce delay."""
+        loop = self._ui_loop
+        if loop is None:
+            callback(value)
+            return
+        
+        def schedule():
+            handle = self._debounce_handles.pop(key, None)
+            if handle is not None:
+                handle.cancel()
+            self._debounce_handles[key] = loop.call_later(_INPUT_DEBOUNCE, callback, value)
+        
+        loop.call_soon_threadsafe(schedule)
+    
+    def _commit_host(self, value: str) -> None:
+        self.settings.connection.host = value
+        self._sender.host = value
+    
+    def _commit_port(self, value: str) -> None:
         try:
-            port = int(e.control.value)
+            port = int(value)
             self.settings.connection.port = port
             self._sender.port = port
         except ValueError:
             pass
     
-    def _on_fps_change(self, e):
+    def _commit_fps(self, value: str) -> None:
         try:
-            fps = int(e.control.value)
+            fps = int(value)
             self.settings.connection.fps = fps
             self._sender.target_fps = fps
         except ValueError:
@@ -522,7 +579,7 @@ class AudioEncoderApp:
 
     def _on_apply_mode(self, _e):
         selected_mode = self.mode_dropdown.value
-        if not selected_mode:
+        if selected_mode not in _MODE_NAME_BY_ID:
             return
 
         self.settings.mode.active_mode = selected_mode
@@ -625,13 +682,13 @@ class AudioEncoderApp:
         self._last_frame_debug = time.time()
         
         def on_audio_frame(frame: AudioFrame):
+            if __debug__:
+                # Providers emit contiguous mono float32 frames
+                assert frame.data.dtype == np.float32 and frame.data.flags['C_CONTIGUOUS']
             self._frame_received_count += 1
             self._ring_buffer.write(frame.data)
             # Update input level (simple peak)
-            try:
-                peak = float(np.max(np.abs(frame.data)))
-            except Exception:
-                peak = 0.0
+            peak = float(np.max(np.abs(frame.data)))
             self._input_level = float(min(1.0, peak * 2.0))
             
             # Debug output every 2 seconds
@@ -675,11 +732,7 @@ class AudioEncoderApp:
             self._current_output = output
             
             # Build packet
-            self._frame_builder.set_values(
-                output.to_bytes_4ch(),
-                output.to_bytes_2ch(),
-                output.to_bytes_rgb()
-            )
+            self._frame_builder.set_values(*output.to_bytes_all())
             return self._frame_builder.build_packet()
         
         self._sender.set_frame_callback(get_frame)
@@ -736,10 +789,9 @@ class AudioEncoderApp:
         
         # Reset preview
         self.input_level_bar.value = 0
-        for container in self.preview_4ch:
-            container.content.height = 0
-        for container in self.preview_2ch:
-            container.content.height = 0
+        for rect in self._rects_4ch + self._rects_2ch:
+            rect.height = 0
+            rect.y = _PREVIEW_HEIGHT
         
         self.page.update()
         
@@ -752,57 +804,66 @@ class AudioEncoderApp:
             return
         
         self._ui_update_running = True
+        self._ui_update_counter = 0
+        
+        async def start_ticks():
+            """Capture the page event loop and schedule the first tick on it."""
+            self._ui_loop = asyncio.get_running_loop()
+            self._ui_next_tick = self._ui_loop.time()
+            self._ui_tick()
+        
+        self.page.run_task(start_ticks)
+    
+    def _ui_tick(self) -> None:
+        """Single UI update, rescheduled on the main event loop via call_at."""
+        self._ui_tick_handle = None
+        if not self._ui_update_running:
+            return
         
-        async def update_loop():
-            """Async UI updates on the main event loop."""
-            update_counter = 0
+        try:
+            # Update UI values
+            level = float(self._input_level) if self._input_level is not None else 0.0
+            self.input_level_bar.value = max(0.0, min(1.0, level))
             
-            while self._ui_update_running:
-                try:
-                    # Update UI values
-                    level = float(self._input_level) if self._input_level is not None else 0.0
-                    self.input_level_bar.value = max(0.0, min(1.0, level))
-                    
-                    # Stats - only show when engine is running
-                    if self._engine_running:
-                        stats = self._sender.stats
-                        self.stats_text.value = (
-                            f"Packets: {stats.packets_sent} | "
-                            f"FPS: {stats.actual_fps:.1f} | "
-                            f"Errors: {stats.errors}"
-                        )
-                        
-                        # 4ch preview
-                        for i, container in enumerate(self.preview_4ch):
-                            if i < len(self._current_output.values_4ch):
-                                height = float(self._current_output.values_4ch[i]) * 90.0
-                                container.content.height = max(2.0, height)
-                        
-                        # 2ch preview
-                        for i, container in enumerate(self.preview_2ch):
-                            if i < len(self._current_output.values_2ch):
-                                height = float(self._current_output.values_2ch[i]) * 90.0
-                                container.content.height = max(2.0, height)
-                    
-                    self.page.update()
-                    
-                    # Debug output every second to verify updates are happening
-                    update_counter += 1
-                    if update_counter % 30 == 0:  # Every ~1 second at 30Hz
-                        print(f"[DEBUG] UI: Level bar updated to {level:.4f}")
-                except RuntimeError as e:
-                    if "destroyed session" in str(e).lower():
-                        self._ui_update_running = False
-                        break
-                    print(f"[DEBUG] UI: Error in update loop: {e}")
-                except Exception as e:
-                    print(f"[DEBUG] UI: Error in update loop: {e}")
+            # Stats - only show when engine is running
+            if self._engine_running:
+                stats = self._sender.stats
+                self.stats_text.value = _STATS_FMT.format(
+                    stats.packets_sent, stats.actual_fps, stats.errors
+                )
                 
-                await asyncio.sleep(1.0 / 30)  # 30 Hz UI updates for smoother animation
+                # 4ch / 2ch preview
+                self._set_preview_bars(self._rects_4ch, self._current_output.values_4ch)
+                self._set_preview_bars(self._rects_2ch, self._current_output.values_2ch)
+            
+            self.page.update()
+            
+            # Debug output every second to verify updates are happening
+            if logger.isEnabledFor(logging.DEBUG):
+                self._ui_update_counter += 1
+                if self._ui_update_counter % _DEBUG_EVERY == 0:
+                    logger.debug(_DEBUG_FMT, level)
+        except RuntimeError as e:
+            if "destroyed session" in str(e).lower():
+                self._ui_update_running = False
+                return
+            logger.warning("UI: Error in update loop: %s", e)
+        except Exception as e:
+            logger.warning("UI: Error in update loop: %s", e)
         
-        self.page.run_task(update_loop)
+        if self._ui_update_running:
+            # 30 Hz UI updates for smoother animation, on a fixed deadline grid
+            self._ui_next_tick += _UI_PERIOD
+            now = self._ui_loop.time()
+            if self._ui_next_tick <= now:
+                # Overran a frame; resync instead of bursting to catch up
+                self._ui_next_tick = now
+            self._ui_tick_handle = self._ui_loop.call_at(self._ui_next_tick, self._ui_tick)
 
     def _on_page_disconnect(self, _e) -> None:
         """Stop background tasks when the page is closed."""
         self._ui_update_running = False
+        handle = self._ui_tick_handle
+        if handle is not None and self._ui_loop is not None:
+            self._ui_loop.call_soon_threadsafe(handle.cancel)
     
@@ -1,26 +1,41 @@
 """Configuration loading and validation for the Lighting Control Hub."""
 
+import copy
+import hashlib
 import logging
+import mmap
+import os
+import string
+import sys
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Iterator, NamedTuple, Optional
 
 import yaml
+from pydantic import ConfigDict, TypeAdapter, ValidationError
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
 
 from app.device_modes import get_mode_or_default, DEFAULT_MODE
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class DeviceTopics:
+class DeviceTopics(NamedTuple):
     """MQTT topics for a device."""
     set_plan: str
     set_static: str
     heartbeat: str
 
 
-@dataclass
+@dataclass(slots=True)
 class DeviceConfig:
     """Configuration for a single ESP device."""
     device_id: str
@@ -32,42 +47,54 @@ class DeviceConfig:
     topics: DeviceTopics
     firmware_version: str = "unknown"
     room: str = ""  # Set after parsing
+    # UDP destination, built once so senders don't allocate a tuple per packet
+    udp_addr: tuple[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.udp_addr = (self.ip, self.udp_port)
 
 
-@dataclass
+@dataclass(slots=True)
 class RoomConfig:
     """Configuration for a room containing devices."""
     name: str
     devices: list[DeviceConfig] = field(default_factory=list)
+    topic_template: str = ""  # e.g. "lights/room1/{device_id}"; used for devices without topics
 
 
-@dataclass
+@dataclass(slots=True)
 class MqttConfig:
     """MQTT broker configuration."""
     broker_host: str = "localhost"
     broker_port: int = 1883
+    # Unix domain socket of a broker on the same host; replaces broker_host/port when set
+    broker_socket_path: str = ""
     client_id: str = "lighting_hub"
+    keepalive_sec: int = 60
     reconnect_delay_min: int = 1
     reconnect_delay_max: int = 60
     heartbeat_timeout_sec: int = 10
 
 
-@dataclass
+@dataclass(slots=True)
 class UdpConfig:
     """UDP streaming configuration."""
     default_port: int = 5000
     send_rate_hz: int = 60
+    send_buffer_bytes: int = 4 * 1024 * 1024  # SO_SNDBUF; the kernel caps it at wmem_max
 
 
-@dataclass
+@dataclass(slots=True)
 class UdpRepeaterConfig:
     """UDP repeater configuration for receiving external frames."""
     enabled: bool = True
     listen_host: str = "0.0.0.0"
     listen_port: int = 5001  # Separate from device ports
+    receive_buffer_bytes: int = 8 * 1024 * 1024  # SO_RCVBUF; the kernel caps it at rmem_max
+    busy_poll_usec: int = 0  # SO_BUSY_POLL on the receive socket (Linux); 0 disables
 
 
-@dataclass
+@dataclass(slots=True)
 class PlannerConfig:
     """Planner configuration."""
     interval_sec: int = 1
@@ -76,7 +103,7 @@ class PlannerConfig:
     plan_payload_version: int = 2  # 1 = legacy (timestamp+interval_ms+sequence), 2 = per-step timestamps
 
 
-@dataclass
+@dataclass(slots=True)
 class AppConfig:
     """Complete application configuration."""
     mqtt: MqttConfig
@@ -84,81 +111,181 @@ class AppConfig:
     planner: PlannerConfig
     udp_repeater: UdpRepeaterConfig = field(default_factory=UdpRepeaterConfig)
     rooms: list[RoomConfig] = field(default_factory=list)
+    # Lookup tables derived from rooms (built once in __post_init__)
+    _all_devices: tuple[DeviceConfig, ...] = field(init=False, repr=False, compare=False)
+    _device_index: dict[str, DeviceConfig] = field(init=False, repr=False, compare=False)
+    # Column views of the device list (same order as all_devices) for bulk fan-out
+    device_ips: tuple[str, ...] = field(init=False, repr=False, compare=False)
+    device_udp_ports: array = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        """Build the device lookup tables from the parsed rooms."""
+        self._all_devices = tuple(device for room in self.rooms for device in room.devices)
+        self._device_index = {device.device_id: device for device in self._all_devices}
+        self.device_ips = tuple(device.ip for device in self._all_devices)
+        self.device_udp_ports = array("H", (device.udp_port for device in self._all_devices))
+
+    @property
+    def all_devices(self) -> tuple[DeviceConfig, ...]:
+        """All devices across all rooms (computed once, shared)."""
+        return self._all_devices
 
     def get_all_devices(self) -> list[DeviceConfig]:
         """Get a flat list of all devices across all rooms."""
-        devices = []
-        for room in self.rooms:
-            devices.extend(room.devices)
-        return devices
+        return list(self._all_devices)
 
     def get_device_by_id(self, device_id: str) -> Optional[DeviceConfig]:
         """Find a device by its ID."""
-        for room in self.rooms:
-            for device in room.devices:
-                if device.device_id == device_id:
-                    return device
-        return None
+        return self._device_index.get(device_id)
+
+
+DEFAULT_CONFIG_PATH = "config/config.yaml"
+
+# Parsed configs keyed by blake2b digest of the file contents (LRU order);
+# callers get copies, so the cached objects are never mutated
+_PARSE_CACHE_SIZE = 4
+_parse_cache: OrderedDict[bytes, AppConfig] = OrderedDict()
+
+# Top-level config sections other than rooms
+_SETTINGS_SECTIONS = ("mqtt", "udp", "planner", "udp_repeater")
+
+
+@lru_cache(maxsize=16)
+def _generic_labels(channels: int) -> tuple[str, ...]:
+    """Generic channel labels (CH1..CHn), shared across devices with the same count."""
+    return tuple(f"CH{i+1}" for i in range(channels))
+
+
+def _check_topic_template(template: str, room_name: str) -> None:
+    """Require a room's topic template to contain exactly one {device_id} field.
+
+    Without it every device in the room would share topics, and heartbeats
+    would all route to one device.
+    """
+    try:
+        fields = [
+            (name, spec, conversion)
+            for _, name, spec, conversion in string.Formatter().parse(template)
+            if name is not None
+        ]
+    except ValueError as e:
+        raise ValueError(f"Invalid topic_template for room '{room_name}': {e}") from e
+    if fields != [("device_id", "", None)]:
+        raise ValueError(
+            f"topic_template for room '{room_name}' must contain exactly one {{device_id}} field "
+            f"and no others, got {template!r}"
+        )
+
+
+def _topics_from_template(template: str, device_id: str) -> DeviceTopics:
+    """Build a device's MQTT topics from its room's topic template."""
+    base = template.format(device_id=device_id)
+    return DeviceTopics(
+        set_plan=sys.intern(f"{base}/set_plan"),
+        set_static=sys.intern(f"{base}/set_static"),
+        heartbeat=sys.intern(f"{base}/heartbeat"),
+    )
 
 
-def load_config(config_path: str = "config/config.yaml") -> AppConfig:
-    """Load configuration from YAML file."""
-    path = Path(config_path)
-    if not path.exists():
-        raise FileNotFoundError(f"Configuration file not found: {config_path}")
+@contextmanager
+def _map_config(path: Path) -> Iterator[mmap.mmap]:
+    """Memory-map a config file read-only; the YAML loader decodes the UTF-8 bytes itself."""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
 
-    with open(path, "r", encoding="utf-8") as f:
-        raw = yaml.safe_load(f)
-
-    # Parse MQTT config
-    mqtt_raw = raw.get("mqtt", {})
-    mqtt_config = MqttConfig(
-        broker_host=mqtt_raw.get("broker_host", "localhost"),
-        broker_port=mqtt_raw.get("broker_port", 1883),
-        client_id=mqtt_raw.get("client_id", "lighting_hub"),
-        reconnect_delay_min=mqtt_raw.get("reconnect_delay_min", 1),
-        reconnect_delay_max=mqtt_raw.get("reconnect_delay_max", 60),
-        heartbeat_timeout_sec=mqtt_raw.get("heartbeat_timeout_sec", 10),
-    )
 
-    # Parse UDP config
-    udp_raw = raw.get("udp", {})
-    udp_config = UdpConfig(
-        default_port=udp_raw.get("default_port", 5000),
-        send_rate_hz=udp_raw.get("send_rate_hz", 60),
-    )
+@dataclass(slots=True)
+class _TopicsSchema:
+    """Schema for a device's topics block."""
+    set_plan: str = ""
+    set_static: str = ""
+    heartbeat: str = ""
+
+
+@dataclass(slots=True)
+class _DeviceSchema:
+    """Schema for a device entry in config.yaml."""
+    device_id: str = ""
+    ip: str = ""
+    udp_port: Optional[int] = None  # Defaults to udp.default_port
+    hw_mode: Optional[str] = None
+    channels: int = 4  # Legacy, only used when hw_mode is not set
+    topics: Optional[_TopicsSchema] = None
+    firmware_version: str = "unknown"
+
+
+@dataclass(slots=True)
+class _RoomSchema:
+    """Schema for a room entry in config.yaml."""
+    name: str = "Unknown Room"
+    topic_template: str = ""
+    devices: list[_DeviceSchema] = field(default_factory=list)
+
+
+# Unquoted YAML scalars such as `firmware_version: 1.0` load as numbers; accept
+# them for str fields as before the schemas existed
+for _schema in (_TopicsSchema, _DeviceSchema, _RoomSchema, MqttConfig, UdpConfig, PlannerConfig, UdpRepeaterConfig):
+    _schema.__pydantic_config__ = ConfigDict(coerce_numbers_to_str=True)
+
+# Validators are built once; they apply field defaults and coerce types in pydantic-core
+_SECTION_ADAPTERS = {
+    "mqtt": TypeAdapter(MqttConfig),
+    "udp": TypeAdapter(UdpConfig),
+    "planner": TypeAdapter(PlannerConfig),
+    "udp_repeater": TypeAdapter(UdpRepeaterConfig),
+}
+_ROOMS_ADAPTER = TypeAdapter(list[_RoomSchema])
+
+
+def _drop_nulls(value: Any) -> Any:
+    """Drop null mapping entries recursively, so keys left empty in YAML take their defaults."""
+    if isinstance(value, dict):
+        return {key: _drop_nulls(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [_drop_nulls(item) for item in value]
+    return value
 
-    # Parse Planner config
-    planner_raw = raw.get("planner", {})
-    planner_config = PlannerConfig(
-        interval_sec=planner_raw.get("interval_sec", 1),
-        steps_per_interval=planner_raw.get("steps_per_interval", 10),
-        interval_ms=planner_raw.get("interval_ms", 100),
-        plan_payload_version=planner_raw.get("plan_payload_version", 2),
-    )
 
-    # Parse UDP Repeater config
-    udp_repeater_raw = raw.get("udp_repeater", {})
-    udp_repeater_config = UdpRepeaterConfig(
-        enabled=udp_repeater_raw.get("enabled", True),
-        listen_host=udp_repeater_raw.get("listen_host", "0.0.0.0"),
-        listen_port=udp_repeater_raw.get("listen_port", 5001),
+def _validate(adapter: TypeAdapter, section: str, value: Any) -> Any:
+    """Validate one config section, raising ValueError with the section name on failure."""
+    try:
+        return adapter.validate_python(_drop_nulls(value))
+    except ValidationError as e:
+        raise ValueError(f"Invalid '{section}' section in configuration: {e}") from e
+
+
+def _parse_settings(raw: dict) -> tuple[MqttConfig, UdpConfig, PlannerConfig, UdpRepeaterConfig]:
+    """Parse the non-room sections of a raw config dict."""
+    mqtt_config, udp_config, planner_config, udp_repeater_config = (
+        _validate(_SECTION_ADAPTERS[section], section, raw.get(section) or {})
+        for section in _SETTINGS_SECTIONS
     )
+    return mqtt_config, udp_config, planner_config, udp_repeater_config
+
 
-    # Parse rooms and devices
+def _parse_rooms(rooms_raw: list, default_udp_port: int) -> list[RoomConfig]:
+    """Parse the rooms section of a raw config dict."""
     rooms = []
-    for room_raw in raw.get("rooms", []):
-        room_name = room_raw.get("name", "Unknown Room")
+    for room_raw in _validate(_ROOMS_ADAPTER, "rooms", rooms_raw or []):
+        room_name = room_raw.name
+        topic_template = room_raw.topic_template
+        if topic_template:
+            _check_topic_template(topic_template, room_name)
         devices = []
-        for dev_raw in room_raw.get("devices", []):
-            topics_raw = dev_raw.get("topics", {})
-            topics = DeviceTopics(
-                set_plan=topics_raw.get("set_plan", ""),
-                set_static=topics_raw.get("set_static", ""),
-                heartbeat=topics_raw.get("heartbeat", ""),
-            )
+        for dev_raw in room_raw.devices:
+            topics_raw = dev_raw.topics
+            if topics_raw is None and topic_template:
+                topics = _topics_from_template(topic_template, dev_raw.device_id)
+            else:
+                topics_raw = topics_raw or _TopicsSchema()
+                topics = DeviceTopics(
+                    set_plan=topics_raw.set_plan,
+                    set_static=topics_raw.set_static,
+                    heartbeat=topics_raw.heartbeat,
+                )
             # Get hw_mode; fall back to legacy 'channels' if hw_mode not specified
-            hw_mode_raw = dev_raw.get("hw_mode")
+            hw_mode_raw = dev_raw.hw_mode
             if hw_mode_raw:
                 mode = get_mode_or_default(hw_mode_raw)
                 hw_mode = mode.mode_id
@@ -166,7 +293,7 @@ def load_config(config_path: str = "config/config.yaml") -> AppConfig:
                 channel_labels = mode.labels
             else:
                 # Legacy fallback: use 'channels' field directly
-                legacy_channels = dev_raw.get("channels", 4)
+                legacy_channels = dev_raw.channels
                 hw_mode = DEFAULT_MODE
                 mode = get_mode_or_default(hw_mode)
                 channels = legacy_channels
@@ -174,50 +301,99 @@ def load_config(config_path: str = "config/config.yaml") -> AppConfig:
                 if legacy_channels == mode.channels:
                     channel_labels = mode.labels
                 else:
-                    channel_labels = tuple(f"CH{i+1}" for i in range(legacy_channels))
+                    channel_labels = _generic_labels(legacy_channels)
                 logger.warning(
-                    f"Device {dev_raw.get('device_id', '?')} uses legacy 'channels' field. "
-                    f"Consider migrating to 'hw_mode'."
+                    "Device %s uses legacy 'channels' field. Consider migrating to 'hw_mode'.",
+                    dev_raw.device_id or "?",
                 )
 
             device = DeviceConfig(
-                device_id=dev_raw.get("device_id", ""),
-                ip=dev_raw.get("ip", ""),
-                udp_port=dev_raw.get("udp_port", udp_config.default_port),
+                device_id=sys.intern(dev_raw.device_id),
+                ip=dev_raw.ip,
+                udp_port=dev_raw.udp_port if dev_raw.udp_port is not None else default_udp_port,
                 hw_mode=hw_mode,
                 channels=channels,
                 channel_labels=channel_labels,
                 topics=topics,
-                firmware_version=dev_raw.get("firmware_version", "unknown"),
+                firmware_version=dev_raw.firmware_version,
                 room=room_name,
             )
             devices.append(device)
-        rooms.append(RoomConfig(name=room_name, devices=devices))
+        rooms.append(RoomConfig(name=room_name, devices=devices, topic_template=topic_template))
+
+    return rooms
+
+
+def load_config(config_path: str = DEFAULT_CONFIG_PATH) -> AppConfig:
+    """
+    Load configuration from YAML file.
+
+    Each section is validated against its schema once (applying defaults and
+    type coercion); the parsers below then read fields directly.
 
-    return AppConfig(
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If a section does not match the schema
+    """
+    path = Path(config_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Configuration file not found: {config_path}")
+
+    with _map_config(path) as mm:
+        digest = hashlib.blake2b(mm, digest_size=16).digest()
+        cached = _parse_cache.get(digest)
+        if cached is not None:
+            _parse_cache.move_to_end(digest)
+            return copy.deepcopy(cached)
+        raw = yaml.load(mm, Loader=_YamlLoader)
+
+    mqtt_config, udp_config, planner_config, udp_repeater_config = _parse_settings(raw)
+    rooms = _parse_rooms(raw.get("rooms"), udp_config.default_port)
+
+    config = AppConfig(
         mqtt=mqtt_config,
         udp=udp_config,
         planner=planner_config,
         udp_repeater=udp_repeater_config,
         rooms=rooms,
     )
+    _parse_cache[digest] = config
+    if len(_parse_cache) > _PARSE_CACHE_SIZE:
+        _parse_cache.popitem(last=False)
+    return copy.deepcopy(config)
 
 
 # Global config instance (loaded on import)
 _config: Optional[AppConfig] = None
+# (st_mtime_ns, st_size) of the file _config was loaded from
+_config_stat: Optional[tuple[int, int]] = None
+
+
+def _stat_key(config_path: str) -> Optional[tuple[int, int]]:
+    """Get the (mtime_ns, size) cache key for a config file, or None if missing."""
+    try:
+        st = os.stat(config_path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
 
 
 def get_config() -> AppConfig:
     """Get the global configuration instance."""
-    global _config
+    global _config, _config_stat
     if _config is None:
+        _config_stat = _stat_key(DEFAULT_CONFIG_PATH)
         _config = load_config()
     return _config
 
 
 def reload_config() -> AppConfig:
-    """Reload configuration from disk."""
-    global _config
+    """Reload configuration from disk (skipped if the file is unchanged)."""
+    global _config, _config_stat
+    stat_key = _stat_key(DEFAULT_CONFIG_PATH)
+    if _config is not None and stat_key is not None and stat_key == _config_stat:
+        return _config
+    _parse_cache.clear()
     _config = load_config()
+    _config_stat = stat_key
     return _config
-
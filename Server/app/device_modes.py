@@ -4,7 +4,8 @@ Each mode defines the number of channels and their labels/order for a device.
 """
 
 from dataclasses import dataclass
-from typing import Optional
+from types import MappingProxyType
+from typing import Mapping, Optional
 
 
 @dataclass(frozen=True)
@@ -18,7 +19,7 @@ class HardwareMode:
 
 # --- Mode Registry ---
 
-MODES: dict[str, HardwareMode] = {
+MODES: Mapping[str, HardwareMode] = MappingProxyType({
     "4ch_v1": HardwareMode(
         mode_id="4ch_v1",
         channels=4,
@@ -37,9 +38,12 @@ MODES: dict[str, HardwareMode] = {
         labels=("Red", "Green", "Blue"),
         description="RGB LED strip (stub)",
     ),
-}
+})
+
+_MODES_TUPLE = tuple(MODES.values())
 
 DEFAULT_MODE = "4ch_v1"
+_DEFAULT_MODE_OBJ = MODES[DEFAULT_MODE]
 
 
 def get_mode(mode_id: str) -> Optional[HardwareMode]:
@@ -49,22 +53,20 @@ def get_mode(mode_id: str) -> Optional[HardwareMode]:
 
 def get_mode_or_default(mode_id: str) -> HardwareMode:
     """Get a hardware mode by ID, falling back to default if not found."""
-    return MODES.get(mode_id) or MODES[DEFAULT_MODE]
+    return MODES.get(mode_id, _DEFAULT_MODE_OBJ)
 
 
 def channels_for(mode_id: str) -> int:
     """Get the number of channels for a hardware mode."""
-    mode = get_mode(mode_id)
-    return mode.channels if mode else MODES[DEFAULT_MODE].channels
+    return MODES.get(mode_id, _DEFAULT_MODE_OBJ).channels
 
 
 def labels_for(mode_id: str) -> tuple[str, ...]:
     """Get channel labels for a hardware mode."""
-    mode = get_mode(mode_id)
-    return mode.labels if mode else MODES[DEFAULT_MODE].labels
+    return MODES.get(mode_id, _DEFAULT_MODE_OBJ).labels
 
 
-def list_modes() -> list[HardwareMode]:
+def list_modes() -> tuple[HardwareMode, ...]:
     """List all available hardware modes."""
-    return list(MODES.values())
+    return _MODES_TUPLE
 
@@ -2,22 +2,29 @@
 
 import asyncio
 import logging
+import os
+import time
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Optional
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse, JSONResponse
+import msgpack
+import orjson
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
 from app.config import get_config
 from app.state import SharedState, DeviceMode, RoomControlMode, FastModeType, get_state
 from app.mqtt_client import MqttClient
 from app.planner import PlannerLoop
+from app.udp_send_pool import UdpSendPool
 from app.udp_streamer import UdpStreamer
 from app.udp_repeater import UdpRepeater
 from app.plans_store import (
-    list_plans, load_plan, save_plan, delete_plan,
+    list_plans, save_plan, delete_plan, plan_exists, get_plan_cache,
     PlanValidationError, _ensure_plans_dir
 )
 
@@ -28,6 +35,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Interactive API docs (/docs, /redoc, /openapi.json); set HUB_API_DOCS=0 to
+# disable them in production.
+API_DOCS_ENABLED = os.environ.get("HUB_API_DOCS", "1") != "0"
+
 # Global instances
 mqtt_client: Optional[MqttClient] = None
 planner_loop: Optional[PlannerLoop] = None
@@ -59,20 +70,31 @@ async def lifespan(app: FastAPI):
     planner_loop.start()
     logger.info("Planner loop started")
 
-    # Start UDP streamer
-    udp_streamer = UdpStreamer(config, state)
+    # Start UDP streamer; the repeater sends through the same sockets
+    send_pool = UdpSendPool(config)
+    udp_streamer = UdpStreamer(config, state, send_pool)
     udp_streamer.start()
     logger.info("UDP streamer started")
 
     # Start UDP repeater (for external frame forwarding)
-    udp_repeater = UdpRepeater(config, state)
+    udp_repeater = UdpRepeater(config, state, send_pool)
     udp_repeater.start()
     logger.info("UDP repeater started")
 
+    # Start background tasks: coalesced WebSocket broadcasters and liveness checks
+    background_tasks = [
+        asyncio.create_task(_coalesced_broadcast_task(_state_broadcast_pending, broadcast_state_update)),
+        asyncio.create_task(_coalesced_broadcast_task(_rooms_broadcast_pending, broadcast_rooms_control_update)),
+        asyncio.create_task(liveness_check_task()),
+    ]
+
     yield
 
     # Shutdown
     logger.info("Shutting down...")
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
     if udp_repeater:
         udp_repeater.stop()
     if udp_streamer:
@@ -89,6 +111,10 @@ app = FastAPI(
     description="Control system for MQTT-connected LED dimmers",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+    docs_url="/docs" if API_DOCS_ENABLED else None,
+    redoc_url="/redoc" if API_DOCS_ENABLED else None,
+    openapi_url="/openapi.json" if API_DOCS_ENABLED else None,
 )
 
 # Mount static files for web UI
@@ -155,6 +181,40 @@ class PlanUpdateRequest(BaseModel):
     steps: list[list[int]]
 
 
+@lru_cache(maxsize=256)
+def _error_body(message: str) -> bytes:
+    """Encode an error body once; repeated bad requests reuse the bytes."""
+    return orjson.dumps({"error": message})
+
+
+def _error(status_code: int, message: str) -> Response:
+    """Build a JSON error response from a cached, pre-encoded body."""
+    return Response(content=_error_body(message), status_code=status_code, media_type="application/json")
+
+
+def _republish_room_static(state: SharedState, room_name: str) -> None:
+    """Publish static values to every device of a room in AUTO/static mode.
+
+    In AUTO mode the room settings have already been applied to its
+    devices, so each device gets the room values adapted to its channel
+    count.
+    """
+    if not mqtt_client or not state.is_room_auto_mode(room_name):
+        return
+    room_state = state.get_room_control_state(room_name)
+    if not room_state or room_state.mode != DeviceMode.STATIC:
+        return
+
+    config = get_config()
+    batch = []
+    for device_id in state.get_devices_in_room(room_name):
+        device_config = config.get_device_by_id(device_id)
+        device_values = state.get_effective_static_values(device_id)
+        if device_config and device_values:
+            batch.append((device_config, device_values))
+    mqtt_client.publish_static_batch(batch)
+
+
 # --- REST API Endpoints ---
 
 @app.get("/")
@@ -170,10 +230,20 @@ async def plans_ui():
 
 
 @app.get("/api/devices")
-async def get_devices():
-    """Get all devices with their current status."""
+async def get_devices(request: Request):
+    """Get all devices with their current status.
+
+    Responses carry an ETag; polling clients that send it back in
+    If-None-Match get an empty 304 while the device status is unchanged.
+    """
     state = get_state()
-    return JSONResponse(content=state.get_all_device_status())
+    body, etag = state.get_all_device_status_etag()
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @app.get("/api/rooms")
@@ -182,19 +252,22 @@ async def get_rooms():
     config = get_config()
     state = get_state()
 
-    rooms_data = []
-    for room in config.rooms:
-        room_data = {
+    # One locked snapshot instead of a lock round-trip per device
+    status_by_id = {s["device_id"]: s for s in state.get_all_device_status()}
+
+    rooms_data = [
+        {
             "name": room.name,
-            "devices": []
+            "devices": [
+                status_by_id[device.device_id]
+                for device in room.devices
+                if device.device_id in status_by_id
+            ],
         }
-        for device in room.devices:
-            device_status = state.get_device_status(device.device_id)
-            if device_status:
-                room_data["devices"].append(device_status)
-        rooms_data.append(room_data)
+        for room in config.rooms
+    ]
 
-    return JSONResponse(content=rooms_data)
+    return ORJSONResponse(content=rooms_data)
 
 
 @app.post("/api/device/{device_id}/mode")
@@ -205,21 +278,15 @@ async def set_device_mode(device_id: str, request: ModeRequest):
     try:
         mode = DeviceMode(request.mode)
     except ValueError:
-        return JSONResponse(
-            status_code=400,
-            content={"error": f"Invalid mode: {request.mode}. Must be 'static', 'planned', or 'fast'"}
-        )
+        return _error(400, f"Invalid mode: {request.mode}. Must be 'static', 'planned', or 'fast'")
 
     if not state.set_device_mode(device_id, mode):
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Device not found: {device_id}"}
-        )
+        return _error(404, f"Device not found: {device_id}")
 
-    # Notify WebSocket clients
-    await broadcast_state_update()
+    # Notify WebSocket clients (coalesced)
+    schedule_state_broadcast()
 
-    return JSONResponse(content={"status": "ok", "device_id": device_id, "mode": mode.value})
+    return ORJSONResponse(content={"status": "ok", "device_id": device_id, "mode": mode.value})
 
 
 @app.post("/api/device/{device_id}/static")
@@ -228,10 +295,7 @@ async def set_static_values(device_id: str, request: StaticRequest):
     state = get_state()
 
     if not state.set_static_values(device_id, request.values):
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Device not found: {device_id}"}
-        )
+        return _error(404, f"Device not found: {device_id}")
 
     # Publish to MQTT if device is in static mode
     if mqtt_client:
@@ -242,24 +306,38 @@ async def set_static_values(device_id: str, request: StaticRequest):
             if device_config:
                 mqtt_client.publish_static(device_config, request.values)
 
-    # Notify WebSocket clients
-    await broadcast_state_update()
+    # Notify WebSocket clients (coalesced)
+    schedule_state_broadcast()
+
+    return ORJSONResponse(content={"status": "ok", "device_id": device_id, "values": request.values})
 
-    return JSONResponse(content={"status": "ok", "device_id": device_id, "values": request.values})
 
+@app.post(
+    "/api/device/{device_id}/fast",
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/json": {"schema": FastRequest.model_json_schema()}},
+            "required": True,
+        },
+    },
+)
+async def set_fast_values(device_id: str, raw: Request):
+    """Set fast mode values for a device (used by audio analyzer or other sources).
 
-@app.post("/api/device/{device_id}/fast")
-async def set_fast_values(device_id: str, request: FastRequest):
-    """Set fast mode values for a device (used by audio analyzer or other sources)."""
+    Called at frame rate, so the body is parsed and validated in a single
+    pydantic-core pass instead of FastAPI's json.loads + model validation.
+    """
     state = get_state()
 
+    try:
+        request = FastRequest.model_validate_json(await raw.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
     if not state.set_fast_values(device_id, request.values):
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Device not found: {device_id}"}
-        )
+        return _error(404, f"Device not found: {device_id}")
 
-    return JSONResponse(content={"status": "ok", "device_id": device_id, "values": request.values})
+    return ORJSONResponse(content={"status": "ok", "device_id": device_id, "values": request.values})
 
 
 @app.post("/api/device/{device_id}/planned_plan")
@@ -269,23 +347,16 @@ async def set_device_planned_plan(device_id: str, request: PlannedPlanRequest):
 
     # Validate plan exists if not unsetting
     if request.plan_id:
-        plan = load_plan(request.plan_id)
-        if not plan:
-            return JSONResponse(
-                status_code=404,
-                content={"error": f"Plan not found: {request.plan_id}"}
-            )
+        if not plan_exists(request.plan_id):
+            return _error(404, f"Plan not found: {request.plan_id}")
 
     if not state.set_device_plan(device_id, request.plan_id):
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Device not found: {device_id}"}
-        )
+        return _error(404, f"Device not found: {device_id}")
 
-    # Notify WebSocket clients
-    await broadcast_state_update()
+    # Notify WebSocket clients (coalesced)
+    schedule_state_broadcast()
 
-    return JSONResponse(content={"status": "ok", "device_id": device_id, "plan_id": request.plan_id})
+    return ORJSONResponse(content={"status": "ok", "device_id": device_id, "plan_id": request.plan_id})
 
 
 @app.post("/api/device/{device_id}/fast_mode_type")
@@ -296,21 +367,15 @@ async def set_device_fast_mode_type(device_id: str, request: DeviceFastModeTypeR
     try:
         fast_mode_type = FastModeType(request.fast_mode_type)
     except ValueError:
-        return JSONResponse(
-            status_code=400,
-            content={"error": f"Invalid fast_mode_type: {request.fast_mode_type}. Must be 'internal' or 'udp_repeater'"}
-        )
+        return _error(400, f"Invalid fast_mode_type: {request.fast_mode_type}. Must be 'internal' or 'udp_repeater'")
 
     if not state.set_device_fast_mode_type(device_id, fast_mode_type):
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Device not found: {device_id}"}
-        )
+        return _error(404, f"Device not found: {device_id}")
 
-    # Notify WebSocket clients
-    await broadcast_state_update()
+    # Notify WebSocket clients (coalesced)
+    schedule_state_broadcast()
 
-    return JSONResponse(content={"status": "ok", "device_id": device_id, "fast_mode_type": fast_mode_type.value})
+    return ORJSONResponse(content={"status": "ok", "device_id": device_id, "fast_mode_type": fast_mode_type.value})
 
 
 # --- Room API ---
@@ -319,7 +384,7 @@ async def set_device_fast_mode_type(device_id: str, request: DeviceFastModeTypeR
 async def get_rooms_control():
     """Get room control states."""
     state = get_state()
-    return JSONResponse(content=state.get_all_room_control_states())
+    return ORJSONResponse(content=state.get_all_room_control_states())
 
 
 @app.post("/api/room/{room_name}/control_mode")
@@ -330,32 +395,20 @@ async def set_room_control_mode(room_name: str, request: RoomControlModeRequest)
     try:
         control_mode = RoomControlMode(request.control_mode)
     except ValueError:
-        return JSONResponse(
-            status_code=400,
-            content={"error": f"Invalid control_mode: {request.control_mode}. Must be 'auto' or 'manual'"}
-        )
+        return _error(400, f"Invalid control_mode: {request.control_mode}. Must be 'auto' or 'manual'")
 
     if not state.set_room_control_mode(room_name, control_mode):
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Room not found: {room_name}"}
-        )
+        return _error(404, f"Room not found: {room_name}")
 
     # If switching to AUTO, publish to MQTT for devices in static mode
-    if control_mode == RoomControlMode.AUTO and mqtt_client:
-        config = get_config()
-        for device_id in state.get_devices_in_room(room_name):
-            device_state = state.get_device_status(device_id)
-            if device_state and device_state.get("mode") == "static":
-                device_config = config.get_device_by_id(device_id)
-                if device_config:
-                    mqtt_client.publish_static(device_config, device_state.get("static_values", []))
+    if control_mode == RoomControlMode.AUTO:
+        _republish_room_static(state, room_name)
 
-    # Notify WebSocket clients
-    await broadcast_state_update()
-    await broadcast_rooms_control_update()
+    # Notify WebSocket clients (coalesced)
+    schedule_state_broadcast()
+    schedule_rooms_control_broadcast()
 
-    return JSONResponse(content={"status": "ok", "room_name": room_name, "control_mode": control_mode.value})
+    return ORJSONResponse(content={"status": "ok", "room_name": room_name, "control_mode": control_mode.value})
 
 
 @app.post("/api/room/{room_name}/mode")
@@ -366,22 +419,16 @@ async def set_room_mode(room_name: str, request: RoomModeRequest):
     try:
         mode = DeviceMode(request.mode)
     except ValueError:
-        return JSONResponse(
-            status_code=400,
-            content={"error": f"Invalid mode: {request.mode}. Must be 'static', 'planned', or 'fast'"}
-        )
+        return _error(400, f"Invalid mode: {request.mode}. Must be 'static', 'planned', or 'fast'")
 
     if not state.set_room_mode(room_name, mode):
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Room not found: {room_name}"}
-        )
+        return _error(404, f"Room not found: {room_name}")
 
-    # Notify WebSocket clients
-    await broadcast_state_update()
-    await broadcast_rooms_control_update()
+    # Notify WebSocket clients (coalesced)
+    schedule_state_broadcast()
+    schedule_rooms_control_broadcast()
 
-    return JSONResponse(content={"status": "ok", "room_name": room_name, "mode": mode.value})
+    return ORJSONResponse(content={"status": "ok", "room_name": room_name, "mode": mode.value})
 
 
 @app.post("/api/room/{room_name}/static")
@@ -390,29 +437,16 @@ async def set_room_static_values(room_name: str, request: RoomStaticRequest):
     state = get_state()
 
     if not state.set_room_static_values(room_name, request.values):
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Room not found: {room_name}"}
-        )
+        return _error(404, f"Room not found: {room_name}")
 
     # Publish to MQTT for devices in static mode within this room
-    if mqtt_client and state.is_room_auto_mode(room_name):
-        config = get_config()
-        room_state = state.get_room_control_state(room_name)
-        if room_state and room_state.mode == DeviceMode.STATIC:
-            for device_id in state.get_devices_in_room(room_name):
-                device_config = config.get_device_by_id(device_id)
-                if device_config:
-                    # Adapt values to device channel count
-                    device_values = state.get_effective_static_values(device_id)
-                    if device_values:
-                        mqtt_client.publish_static(device_config, device_values)
+    _republish_room_static(state, room_name)
 
-    # Notify WebSocket clients
-    await broadcast_state_update()
-    await broadcast_rooms_control_update()
+    # Notify WebSocket clients (coalesced)
+    schedule_state_broadcast()
+    schedule_rooms_control_broadcast()
 
-    return JSONResponse(content={"status": "ok", "room_name": room_name, "values": request.values})
+    return ORJSONResponse(content={"status": "ok", "room_name": room_name, "values": request.values})
 
 
 @app.post("/api/room/{room_name}/planned_plan")
@@ -422,24 +456,17 @@ async def set_room_planned_plan(room_name: str, request: RoomPlannedPlanRequest)
 
     # Validate plan exists if not unsetting
     if request.plan_id:
-        plan = load_plan(request.plan_id)
-        if not plan:
-            return JSONResponse(
-                status_code=404,
-                content={"error": f"Plan not found: {request.plan_id}"}
-            )
+        if not plan_exists(request.plan_id):
+            return _error(404, f"Plan not found: {request.plan_id}")
 
     if not state.set_room_planned_plan(room_name, request.plan_id):
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Room not found: {room_name}"}
-        )
+        return _error(404, f"Room not found: {room_name}")
 
-    # Notify WebSocket clients
-    await broadcast_state_update()
-    await broadcast_rooms_control_update()
+    # Notify WebSocket clients (coalesced)
+    schedule_state_broadcast()
+    schedule_rooms_control_broadcast()
 
-    return JSONResponse(content={"status": "ok", "room_name": room_name, "plan_id": request.plan_id})
+    return ORJSONResponse(content={"status": "ok", "room_name": room_name, "plan_id": request.plan_id})
 
 
 @app.post("/api/room/{room_name}/fast_mode_type")
@@ -450,22 +477,16 @@ async def set_room_fast_mode_type(room_name: str, request: RoomFastModeTypeReque
     try:
         fast_mode_type = FastModeType(request.fast_mode_type)
     except ValueError:
-        return JSONResponse(
-            status_code=400,
-            content={"error": f"Invalid fast_mode_type: {request.fast_mode_type}. Must be 'internal' or 'udp_repeater'"}
-        )
+        return _error(400, f"Invalid fast_mode_type: {request.fast_mode_type}. Must be 'internal' or 'udp_repeater'")
 
     if not state.set_room_fast_mode_type(room_name, fast_mode_type):
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Room not found: {room_name}"}
-        )
+        return _error(404, f"Room not found: {room_name}")
 
-    # Notify WebSocket clients
-    await broadcast_state_update()
-    await broadcast_rooms_control_update()
+    # Notify WebSocket clients (coalesced)
+    schedule_state_broadcast()
+    schedule_rooms_control_broadcast()
 
-    return JSONResponse(content={"status": "ok", "room_name": room_name, "fast_mode_type": fast_mode_type.value})
+    return ORJSONResponse(content={"status": "ok", "room_name": room_name, "fast_mode_type": fast_mode_type.value})
 
 
 # --- Plans API ---
@@ -474,19 +495,16 @@ async def set_room_fast_mode_type(room_name: str, request: RoomFastModeTypeReque
 async def get_plans():
     """List all available plans."""
     plans = list_plans()
-    return JSONResponse(content=[p.to_dict() for p in plans])
+    return ORJSONResponse(content=[p.to_dict() for p in plans])
 
 
 @app.get("/api/plans/{plan_id}")
 async def get_plan(plan_id: str):
     """Get a specific plan by ID."""
-    plan = load_plan(plan_id)
+    plan = get_plan_cache().get(plan_id)
     if not plan:
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Plan not found: {plan_id}"}
-        )
-    return JSONResponse(content=plan.to_dict())
+        return _error(404, f"Plan not found: {plan_id}")
+    return ORJSONResponse(content=plan.to_dict())
 
 
 @app.post("/api/plans")
@@ -494,74 +512,91 @@ async def create_plan(request: PlanCreateRequest):
     """Create a new plan."""
     try:
         plan = save_plan(request.model_dump())
-        return JSONResponse(content=plan.to_dict(), status_code=201)
+        return ORJSONResponse(content=plan.to_dict(), status_code=201)
     except PlanValidationError as e:
-        return JSONResponse(
-            status_code=400,
-            content={"error": str(e)}
-        )
+        return _error(400, str(e))
 
 
 @app.put("/api/plans/{plan_id}")
 async def update_plan(plan_id: str, request: PlanUpdateRequest):
     """Update an existing plan."""
     # Check if plan exists
-    existing = load_plan(plan_id)
-    if not existing:
-        return JSONResponse(
-            status_code=404,
-            content={"error": f"Plan not found: {plan_id}"}
-        )
+    if not plan_exists(plan_id):
+        return _error(404, f"Plan not found: {plan_id}")
 
     try:
         plan = save_plan(request.model_dump(), plan_id=plan_id)
-        return JSONResponse(content=plan.to_dict())
+        return ORJSONResponse(content=plan.to_dict())
     except PlanValidationError as e:
-        return JSONResponse(
-            status_code=400,
-            content={"error": str(e)}
-        )
+        return _error(400, str(e))
 
 
 @app.delete("/api/plans/{plan_id}")
 async def delete_plan_endpoint(plan_id: str):
     """Delete a plan."""
     if delete_plan(plan_id):
-        return JSONResponse(content={"status": "ok", "plan_id": plan_id})
-    return JSONResponse(
-        status_code=404,
-        content={"error": f"Plan not found: {plan_id}"}
-    )
+        return ORJSONResponse(content={"status": "ok", "plan_id": plan_id})
+    return _error(404, f"Plan not found: {plan_id}")
 
 
 # --- WebSocket ---
 
-connected_websockets: set[WebSocket] = set()
+# Copy-on-write: rebound (never mutated) so broadcasts can iterate a
+# snapshot without copying it.
+connected_websockets: tuple[WebSocket, ...] = ()
+# Clients that opted into MessagePack binary frames via /ws?encoding=msgpack
+msgpack_websockets: set[WebSocket] = set()
+
+
+def _drop_clients(clients: set[WebSocket]) -> None:
+    """Remove clients from the connected snapshot and encoding registry."""
+    global connected_websockets
+    connected_websockets = tuple(ws for ws in connected_websockets if ws not in clients)
+    msgpack_websockets.difference_update(clients)
+
+
+async def _send(websocket: WebSocket, message: dict) -> None:
+    """Send a message to one client using its negotiated encoding."""
+    if websocket in msgpack_websockets:
+        await websocket.send_bytes(msgpack.packb(message))
+    else:
+        await websocket.send_text(orjson.dumps(message).decode())
 
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time updates."""
+    """WebSocket endpoint for real-time updates.
+
+    Clients connect with JSON text frames by default; `?encoding=msgpack`
+    switches both directions to MessagePack binary frames.
+    """
+    global connected_websockets
     await websocket.accept()
-    connected_websockets.add(websocket)
+    use_msgpack = websocket.query_params.get("encoding") == "msgpack"
+    if use_msgpack:
+        msgpack_websockets.add(websocket)
+    connected_websockets += (websocket,)
     logger.info(f"WebSocket client connected. Total: {len(connected_websockets)}")
 
     try:
         # Send initial state
         state = get_state()
-        await websocket.send_json({
+        await _send(websocket, {
             "type": "init",
             "data": state.get_all_device_status()
         })
         # Also send room control states
-        await websocket.send_json({
+        await _send(websocket, {
             "type": "rooms_control",
             "data": state.get_all_room_control_states()
         })
 
         # Handle incoming messages
         while True:
-            data = await websocket.receive_json()
+            if use_msgpack:
+                data = msgpack.unpackb(await websocket.receive_bytes())
+            else:
+                data = orjson.loads(await websocket.receive_text())
             await handle_websocket_message(websocket, data)
 
     except WebSocketDisconnect:
@@ -569,195 +604,241 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        connected_websockets.discard(websocket)
+        _drop_clients({websocket})
 
 
-async def handle_websocket_message(websocket: WebSocket, data: dict):
-    """Handle incoming WebSocket messages."""
-    msg_type = data.get("type")
-    state = get_state()
+async def _ws_set_mode(websocket: WebSocket, data: dict, state: SharedState):
+    """Set a device's operating mode."""
+    device_id = data.get("device_id")
+    mode_str = data.get("mode")
+    try:
+        mode = DeviceMode(mode_str)
+        state.set_device_mode(device_id, mode)
+        schedule_state_broadcast()
+    except ValueError:
+        await _send(websocket, {"type": "error", "message": f"Invalid mode: {mode_str}"})
 
-    if msg_type == "set_mode":
-        device_id = data.get("device_id")
-        mode_str = data.get("mode")
-        try:
-            mode = DeviceMode(mode_str)
-            state.set_device_mode(device_id, mode)
-            await broadcast_state_update()
-        except ValueError:
-            await websocket.send_json({"type": "error", "message": f"Invalid mode: {mode_str}"})
-
-    elif msg_type == "set_static":
-        device_id = data.get("device_id")
-        values = data.get("values", [])
-        if state.set_static_values(device_id, values):
-            # Publish to MQTT
-            if mqtt_client:
-                device_state = state.get_device_status(device_id)
-                if device_state and device_state.get("mode") == "static":
-                    config = get_config()
-                    device_config = config.get_device_by_id(device_id)
-                    if device_config:
-                        mqtt_client.publish_static(device_config, values)
-            await broadcast_state_update()
-
-    elif msg_type == "set_fast":
-        device_id = data.get("device_id")
-        values = data.get("values", [])
-        state.set_fast_values(device_id, values)
-
-    elif msg_type == "set_planned_plan":
-        device_id = data.get("device_id")
-        plan_id = data.get("plan_id")  # Can be None to unassign
-        if plan_id:
-            plan = load_plan(plan_id)
-            if not plan:
-                await websocket.send_json({"type": "error", "message": f"Plan not found: {plan_id}"})
-                return
-        state.set_device_plan(device_id, plan_id)
-        await broadcast_state_update()
 
-    elif msg_type == "set_device_fast_mode_type":
-        device_id = data.get("device_id")
-        fast_mode_type_str = data.get("fast_mode_type")
-        try:
-            fast_mode_type = FastModeType(fast_mode_type_str)
-            state.set_device_fast_mode_type(device_id, fast_mode_type)
-            await broadcast_state_update()
-        except ValueError:
-            await websocket.send_json({"type": "error", "message": f"Invalid fast_mode_type: {fast_mode_type_str}"})
-
-    elif msg_type == "get_state":
-        await websocket.send_json({
-            "type": "state",
-            "data": state.get_all_device_status()
-        })
+async def _ws_set_static(websocket: WebSocket, data: dict, state: SharedState):
+    """Set a device's static values and publish them if it is in static mode."""
+    device_id = data.get("device_id")
+    values = data.get("values", [])
+    if state.set_static_values(device_id, values):
+        # Publish to MQTT
+        if mqtt_client:
+            device_state = state.get_device_status(device_id)
+            if device_state and device_state.get("mode") == "static":
+                config = get_config()
+                device_config = config.get_device_by_id(device_id)
+                if device_config:
+                    mqtt_client.publish_static(device_config, values)
+        schedule_state_broadcast()
 
-    elif msg_type == "get_rooms_control":
-        await websocket.send_json({
-            "type": "rooms_control",
-            "data": state.get_all_room_control_states()
-        })
 
-    # --- Room-level commands ---
+async def _ws_set_fast(websocket: WebSocket, data: dict, state: SharedState):
+    """Set a device's fast mode values (no broadcast; sent at frame rate)."""
+    state.set_fast_values(data.get("device_id"), data.get("values", []))
 
-    elif msg_type == "set_room_control_mode":
-        room_name = data.get("room_name")
-        control_mode_str = data.get("control_mode")
-        try:
-            control_mode = RoomControlMode(control_mode_str)
-            if state.set_room_control_mode(room_name, control_mode):
-                # If switching to AUTO, publish to MQTT for devices in static mode
-                if control_mode == RoomControlMode.AUTO and mqtt_client:
-                    config = get_config()
-                    for device_id in state.get_devices_in_room(room_name):
-                        device_state = state.get_device_status(device_id)
-                        if device_state and device_state.get("mode") == "static":
-                            device_config = config.get_device_by_id(device_id)
-                            if device_config:
-                                mqtt_client.publish_static(device_config, device_state.get("static_values", []))
-                await broadcast_state_update()
-                await broadcast_rooms_control_update()
-            else:
-                await websocket.send_json({"type": "error", "message": f"Room not found: {room_name}"})
-        except ValueError:
-            await websocket.send_json({"type": "error", "message": f"Invalid control_mode: {control_mode_str}"})
 
-    elif msg_type == "set_room_mode":
-        room_name = data.get("room_name")
-        mode_str = data.get("mode")
-        try:
-            mode = DeviceMode(mode_str)
-            if state.set_room_mode(room_name, mode):
-                await broadcast_state_update()
-                await broadcast_rooms_control_update()
-            else:
-                await websocket.send_json({"type": "error", "message": f"Room not found: {room_name}"})
-        except ValueError:
-            await websocket.send_json({"type": "error", "message": f"Invalid mode: {mode_str}"})
-
-    elif msg_type == "set_room_static":
-        room_name = data.get("room_name")
-        values = data.get("values", [])
-        if state.set_room_static_values(room_name, values):
-            # Publish to MQTT for devices in static mode within this room
-            if mqtt_client and state.is_room_auto_mode(room_name):
-                config = get_config()
-                room_state = state.get_room_control_state(room_name)
-                if room_state and room_state.mode == DeviceMode.STATIC:
-                    for device_id in state.get_devices_in_room(room_name):
-                        device_config = config.get_device_by_id(device_id)
-                        if device_config:
-                            device_values = state.get_effective_static_values(device_id)
-                            if device_values:
-                                mqtt_client.publish_static(device_config, device_values)
-            await broadcast_state_update()
-            await broadcast_rooms_control_update()
+async def _ws_set_planned_plan(websocket: WebSocket, data: dict, state: SharedState):
+    """Assign (or unassign) a plan to a device."""
+    device_id = data.get("device_id")
+    plan_id = data.get("plan_id")  # Can be None to unassign
+    if plan_id:
+        if not plan_exists(plan_id):
+            await _send(websocket, {"type": "error", "message": f"Plan not found: {plan_id}"})
+            return
+    state.set_device_plan(device_id, plan_id)
+    schedule_state_broadcast()
+
+
+async def _ws_set_device_fast_mode_type(websocket: WebSocket, data: dict, state: SharedState):
+    """Set a device's fast mode type."""
+    device_id = data.get("device_id")
+    fast_mode_type_str = data.get("fast_mode_type")
+    try:
+        fast_mode_type = FastModeType(fast_mode_type_str)
+        state.set_device_fast_mode_type(device_id, fast_mode_type)
+        schedule_state_broadcast()
+    except ValueError:
+        await _send(websocket, {"type": "error", "message": f"Invalid fast_mode_type: {fast_mode_type_str}"})
+
+
+async def _ws_get_state(websocket: WebSocket, data: dict, state: SharedState):
+    """Send the current device states to the requesting client."""
+    await _send(websocket, {
+        "type": "state",
+        "data": state.get_all_device_status()
+    })
+
+
+async def _ws_get_rooms_control(websocket: WebSocket, data: dict, state: SharedState):
+    """Send the current room control states to the requesting client."""
+    await _send(websocket, {
+        "type": "rooms_control",
+        "data": state.get_all_room_control_states()
+    })
+
+
+# --- Room-level commands ---
+
+async def _ws_set_room_control_mode(websocket: WebSocket, data: dict, state: SharedState):
+    """Set a room's control mode (AUTO/MANUAL)."""
+    room_name = data.get("room_name")
+    control_mode_str = data.get("control_mode")
+    try:
+        control_mode = RoomControlMode(control_mode_str)
+        if state.set_room_control_mode(room_name, control_mode):
+            # If switching to AUTO, publish to MQTT for devices in static mode
+            if control_mode == RoomControlMode.AUTO:
+                _republish_room_static(state, room_name)
+            schedule_state_broadcast()
+            schedule_rooms_control_broadcast()
+        else:
+            await _send(websocket, {"type": "error", "message": f"Room not found: {room_name}"})
+    except ValueError:
+        await _send(websocket, {"type": "error", "message": f"Invalid control_mode: {control_mode_str}"})
+
+
+async def _ws_set_room_mode(websocket: WebSocket, data: dict, state: SharedState):
+    """Set the operating mode for a room."""
+    room_name = data.get("room_name")
+    mode_str = data.get("mode")
+    try:
+        mode = DeviceMode(mode_str)
+        if state.set_room_mode(room_name, mode):
+            schedule_state_broadcast()
+            schedule_rooms_control_broadcast()
         else:
-            await websocket.send_json({"type": "error", "message": f"Room not found: {room_name}"})
-
-    elif msg_type == "set_room_planned_plan":
-        room_name = data.get("room_name")
-        plan_id = data.get("plan_id")  # Can be None to unassign
-        if plan_id:
-            plan = load_plan(plan_id)
-            if not plan:
-                await websocket.send_json({"type": "error", "message": f"Plan not found: {plan_id}"})
-                return
-        if state.set_room_planned_plan(room_name, plan_id):
-            await broadcast_state_update()
-            await broadcast_rooms_control_update()
+            await _send(websocket, {"type": "error", "message": f"Room not found: {room_name}"})
+    except ValueError:
+        await _send(websocket, {"type": "error", "message": f"Invalid mode: {mode_str}"})
+
+
+async def _ws_set_room_static(websocket: WebSocket, data: dict, state: SharedState):
+    """Set static values for a room and publish them in AUTO/static mode."""
+    room_name = data.get("room_name")
+    values = data.get("values", [])
+    if state.set_room_static_values(room_name, values):
+        # Publish to MQTT for devices in static mode within this room
+        _republish_room_static(state, room_name)
+        schedule_state_broadcast()
+        schedule_rooms_control_broadcast()
+    else:
+        await _send(websocket, {"type": "error", "message": f"Room not found: {room_name}"})
+
+
+async def _ws_set_room_planned_plan(websocket: WebSocket, data: dict, state: SharedState):
+    """Assign (or unassign) a plan to a room."""
+    room_name = data.get("room_name")
+    plan_id = data.get("plan_id")  # Can be None to unassign
+    if plan_id:
+        if not plan_exists(plan_id):
+            await _send(websocket, {"type": "error", "message": f"Plan not found: {plan_id}"})
+            return
+    if state.set_room_planned_plan(room_name, plan_id):
+        schedule_state_broadcast()
+        schedule_rooms_control_broadcast()
+    else:
+        await _send(websocket, {"type": "error", "message": f"Room not found: {room_name}"})
+
+
+async def _ws_set_room_fast_mode_type(websocket: WebSocket, data: dict, state: SharedState):
+    """Set the fast mode type for a room."""
+    room_name = data.get("room_name")
+    fast_mode_type_str = data.get("fast_mode_type")
+    try:
+        fast_mode_type = FastModeType(fast_mode_type_str)
+        if state.set_room_fast_mode_type(room_name, fast_mode_type):
+            schedule_state_broadcast()
+            schedule_rooms_control_broadcast()
         else:
-            await websocket.send_json({"type": "error", "message": f"Room not found: {room_name}"})
+            await _send(websocket, {"type": "error", "message": f"Room not found: {room_name}"})
+    except ValueError:
+        await _send(websocket, {"type": "error", "message": f"Invalid fast_mode_type: {fast_mode_type_str}"})
 
-    elif msg_type == "set_room_fast_mode_type":
-        room_name = data.get("room_name")
-        fast_mode_type_str = data.get("fast_mode_type")
-        try:
-            fast_mode_type = FastModeType(fast_mode_type_str)
-            if state.set_room_fast_mode_type(room_name, fast_mode_type):
-                await broadcast_state_update()
-                await broadcast_rooms_control_update()
-            else:
-                await websocket.send_json({"type": "error", "message": f"Room not found: {room_name}"})
-        except ValueError:
-            await websocket.send_json({"type": "error", "message": f"Invalid fast_mode_type: {fast_mode_type_str}"})
+
+async def _ws_ignore(websocket: WebSocket, data: dict, state: SharedState):
+    """Unknown message types are ignored."""
+
+
+# Message type -> handler, looked up once per incoming message
+_WS_HANDLERS = {
+    "set_mode": _ws_set_mode,
+    "set_static": _ws_set_static,
+    "set_fast": _ws_set_fast,
+    "set_planned_plan": _ws_set_planned_plan,
+    "set_device_fast_mode_type": _ws_set_device_fast_mode_type,
+    "get_state": _ws_get_state,
+    "get_rooms_control": _ws_get_rooms_control,
+    "set_room_control_mode": _ws_set_room_control_mode,
+    "set_room_mode": _ws_set_room_mode,
+    "set_room_static": _ws_set_room_static,
+    "set_room_planned_plan": _ws_set_room_planned_plan,
+    "set_room_fast_mode_type": _ws_set_room_fast_mode_type,
+}
+
+
+async def handle_websocket_message(websocket: WebSocket, data: dict):
+    """Handle incoming WebSocket messages."""
+    handler = _WS_HANDLERS.get(data.get("type"), _ws_ignore)
+    await handler(websocket, data, get_state())
+
+
+async def _send_to_all(message: dict, text: Optional[str] = None) -> None:
+    """Send a message to all connected WebSocket clients.
+
+    The message is serialized at most once per encoding (JSON clients get
+    text as-is if the caller already has it encoded), and sends run
+    concurrently so one slow client doesn't delay the others.
+    """
+    clients = connected_websockets
+    packed: Optional[bytes] = None
+    sends = []
+    for ws in clients:
+        if ws in msgpack_websockets:
+            if packed is None:
+                packed = msgpack.packb(message)
+            sends.append(ws.send_bytes(packed))
+        else:
+            if text is None:
+                text = orjson.dumps(message).decode()
+            sends.append(ws.send_text(text))
+    results = await asyncio.gather(*sends, return_exceptions=True)
+
+    # Clean up disconnected clients
+    failed = {ws for ws, result in zip(clients, results) if isinstance(result, Exception)}
+    if failed:
+        _drop_clients(failed)
 
 
 async def broadcast_state_update(force: bool = False):
     """Broadcast state update to all connected WebSocket clients.
     
     Args:
-        force: If True, broadcast even if state hasn't changed (used for liveness ticks)
+        force: If True, broadcast even if state hasn't changed
     """
     if not connected_websockets:
         return
 
     state = get_state()
-    
-    # Skip broadcast if state hasn't changed (unless forced)
-    if not force and not state.has_state_changed():
-        return
 
-    state_data = state.get_all_device_status()
-    message = {
-        "type": "state",
-        "data": state_data
-    }
+    if force:
+        version = state.get_state_version()
+        state_data, state_json = state.get_all_device_status_snapshot()
+    else:
+        # Version check first; nothing is built when state is unchanged
+        changed = state.get_all_device_status_if_changed()
+        if changed is None:
+            return
+        version, state_data, state_json = changed
 
-    disconnected = set()
-    for ws in connected_websockets:
-        try:
-            await ws.send_json(message)
-        except Exception:
-            disconnected.add(ws)
+    # Splice the cached status encoding instead of re-serializing it
+    text = (b'{"type":"state","data":' + state_json + b"}").decode()
+    await _send_to_all({"type": "state", "data": state_data}, text)
 
-    # Clean up disconnected clients
-    for ws in disconnected:
-        connected_websockets.discard(ws)
-    
     # Mark state as broadcast for change detection
-    state.mark_broadcast_complete(state_data)
+    state.mark_broadcast_complete(version)
 
 
 async def broadcast_rooms_control_update():
@@ -767,38 +848,62 @@ async def broadcast_rooms_control_update():
 
     state = get_state()
     rooms_data = state.get_all_room_control_states()
-    message = {
-        "type": "rooms_control",
-        "data": rooms_data
-    }
+    await _send_to_all({"type": "rooms_control", "data": rooms_data})
 
-    disconnected = set()
-    for ws in connected_websockets:
-        try:
-            await ws.send_json(message)
-        except Exception:
-            disconnected.add(ws)
 
-    # Clean up disconnected clients
-    for ws in disconnected:
-        connected_websockets.discard(ws)
+# --- Coalesced broadcasts ---
+
+# Bursts of updates (e.g. dragging a slider) within this window produce a
+# single broadcast instead of one per request.
+BROADCAST_COALESCE_SEC = 0.05
+
+_state_broadcast_pending = asyncio.Event()
+_rooms_broadcast_pending = asyncio.Event()
+
+
+def schedule_state_broadcast() -> None:
+    """Request a device state broadcast; flushed by the coalescing task."""
+    _state_broadcast_pending.set()
+
+
+def schedule_rooms_control_broadcast() -> None:
+    """Request a room control broadcast; flushed by the coalescing task."""
+    _rooms_broadcast_pending.set()
+
+
+async def _coalesced_broadcast_task(pending: asyncio.Event, broadcast) -> None:
+    """Run `broadcast` at most once per coalescing window while `pending` is set."""
+    while True:
+        await pending.wait()
+        await asyncio.sleep(BROADCAST_COALESCE_SEC)
+        pending.clear()
+        try:
+            await broadcast()
+        except Exception as e:
+            logger.error(f"Broadcast error: {e}")
 
 
 # Background task for liveness checking (online->offline transitions)
+LIVENESS_POLL_SEC = 3.0
+# Wake slightly after a heartbeat deadline so the device is already stale
+LIVENESS_EXPIRY_MARGIN_SEC = 0.05
+
+
 async def liveness_check_task():
-    """Periodically check for online->offline transitions and broadcast if needed."""
+    """Check for state changes and broadcast if needed.
+
+    Polls every LIVENESS_POLL_SEC to pick up changes made by the MQTT and
+    UDP threads, but wakes early at the next heartbeat expiry so devices
+    going offline are reported immediately.
+    """
     state = get_state()
     while True:
-        await asyncio.sleep(3)  # Check every 3 seconds
-        
-        # Force-check state and broadcast only if there are actual changes
-        # This handles devices going offline due to heartbeat timeout
-        if state.has_state_changed():
-            await broadcast_state_update(force=True)
-
-
-@app.on_event("startup")
-async def start_status_updates():
-    """Start the background liveness check task."""
-    asyncio.create_task(liveness_check_task())
+        delay = LIVENESS_POLL_SEC
+        expiry = state.get_next_heartbeat_expiry()
+        if expiry is not None:
+            delay = min(delay, max(0.0, expiry - time.monotonic()) + LIVENESS_EXPIRY_MARGIN_SEC)
+        await asyncio.sleep(delay)
 
+        # Broadcast only if there are actual changes
+        # This handles devices going offline due to heartbeat timeout
+        await broadcast_state_update()
@@ -1,11 +1,12 @@
 """MQTT client with auto-reconnect and heartbeat subscription."""
 
-import json
 import logging
+import random
 import threading
-import time
-from typing import Optional
+from functools import partial
+from typing import Optional, Sequence
 
+import orjson
 import paho.mqtt.client as mqtt
 
 from app.config import AppConfig, DeviceConfig
@@ -25,10 +26,14 @@ class MqttClient:
         self._thread: Optional[threading.Thread] = None
         self._reconnect_delay = config.mqtt.reconnect_delay_min
         self._lock = threading.Lock()
+        # Set by _on_disconnect (or stop) to wake the connection manager
+        self._disconnected = threading.Event()
+        # Set by stop() so a pending backoff wait returns immediately
+        self._stopping = threading.Event()
 
         # Build topic to device_id mapping for heartbeats
         self._heartbeat_topics: dict[str, str] = {}
-        for device in config.get_all_devices():
+        for device in config.all_devices:
             if device.topics.heartbeat:
                 self._heartbeat_topics[device.topics.heartbeat] = device.device_id
 
@@ -38,12 +43,14 @@ class MqttClient:
             return
 
         self._running = True
+        self._stopping.clear()
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
 
     def stop(self) -> None:
         """Stop the MQTT client."""
         self._running = False
+        self._stopping.set()
         with self._lock:
             if self._client:
                 try:
@@ -51,44 +58,82 @@ class MqttClient:
                     self._client.loop_stop()
                 except Exception as e:
                     logger.warning(f"Error during MQTT disconnect: {e}")
+        self._disconnected.set()
         if self._thread:
             self._thread.join(timeout=5)
 
     def _run_loop(self) -> None:
-        """Main loop for MQTT connection management."""
+        """Main loop for MQTT connection management.
+
+        paho's network thread (loop_start) services the socket; this thread
+        just sleeps until the connection drops, then reconnects with backoff.
+        """
         while self._running:
             try:
+                self._disconnected.clear()
                 self._connect()
-                # Run network loop (blocking with timeout)
-                while self._running and self._client:
-                    self._client.loop(timeout=1.0)
+                self._disconnected.wait()
             except Exception as e:
                 logger.error(f"MQTT connection error: {e}")
                 self._state.increment_mqtt_error()
                 self._state.set_mqtt_connected(False)
-                self._backoff_reconnect()
+
+            if not self._running:
+                break
+            self._stop_network_loop()
+            self._backoff_reconnect()
+
+    def _stop_network_loop(self) -> None:
+        """Stop paho's network thread for the current client."""
+        with self._lock:
+            client = self._client
+        if client:
+            try:
+                client.loop_stop()
+            except Exception as e:
+                logger.warning(f"Error stopping MQTT network loop: {e}")
 
     def _connect(self) -> None:
         """Establish MQTT connection."""
         with self._lock:
-            # Create new client
-            self._client = mqtt.Client(
-                client_id=self._config.mqtt.client_id,
+            mqtt_config = self._config.mqtt
+            client_kwargs = dict(
+                client_id=mqtt_config.client_id,
                 callback_api_version=mqtt.CallbackAPIVersion.VERSION2,
+                # Reconnects are driven by _run_loop (with backoff), not paho
+                reconnect_on_failure=False,
             )
 
+            # A local broker's Unix socket replaces host/port; paho takes its path as the host
+            if mqtt_config.broker_socket_path:
+                client_kwargs["transport"] = "unix"
+                host = mqtt_config.broker_socket_path
+            else:
+                host = mqtt_config.broker_host
+
+            # Create new client
+            self._client = mqtt.Client(**client_kwargs)
+
             # Set callbacks
             self._client.on_connect = self._on_connect
             self._client.on_disconnect = self._on_disconnect
             self._client.on_message = self._on_message
+            # Heartbeats are routed by paho's topic matcher straight to a
+            # handler bound to their device; on_message only sees the rest
+            for topic, device_id in self._heartbeat_topics.items():
+                self._client.message_callback_add(topic, partial(self._on_heartbeat, device_id))
 
             # Connect
-            logger.info(f"Connecting to MQTT broker at {self._config.mqtt.broker_host}:{self._config.mqtt.broker_port}")
+            if mqtt_config.broker_socket_path:
+                logger.info(f"Connecting to MQTT broker at unix:{mqtt_config.broker_socket_path}")
+            else:
+                logger.info(f"Connecting to MQTT broker at {mqtt_config.broker_host}:{mqtt_config.broker_port}")
             self._client.connect(
-                self._config.mqtt.broker_host,
-                self._config.mqtt.broker_port,
-                keepalive=60
+                host,
+                mqtt_config.broker_port,
+                keepalive=mqtt_config.keepalive_sec
             )
+            self._client.loop_start()
 
     def _on_connect(self, client, userdata, flags, reason_code, properties=None):
         """Handle successful connection."""
@@ -97,48 +142,61 @@ class MqttClient:
             self._state.set_mqtt_connected(True)
             self._reconnect_delay = self._config.mqtt.reconnect_delay_min
 
-            # Subscribe to all heartbeat topics
-            for topic in self._heartbeat_topics.keys():
-                client.subscribe(topic)
-                logger.debug(f"Subscribed to heartbeat topic: {topic}")
+            # Subscribe to all heartbeat topics in a single SUBSCRIBE packet
+            if self._heartbeat_topics:
+                client.subscribe([(topic, 0) for topic in self._heartbeat_topics])
+                logger.debug(f"Subscribed to {len(self._heartbeat_topics)} heartbeat topics")
         else:
             logger.error(f"MQTT connection failed with code: {reason_code}")
             self._state.set_mqtt_connected(False)
+            self._disconnected.set()
 
     def _on_disconnect(self, client, userdata, disconnect_flags, reason_code, properties=None):
         """Handle disconnection."""
         logger.warning(f"Disconnected from MQTT broker (code: {reason_code})")
         self._state.set_mqtt_connected(False)
+        self._disconnected.set()
 
-    def _on_message(self, client, userdata, msg):
-        """Handle incoming MQTT messages."""
-        topic = msg.topic
+    def _on_heartbeat(self, device_id: str, client, userdata, msg):
+        """Handle a heartbeat from device_id."""
         try:
-            # Check if this is a heartbeat message
-            if topic in self._heartbeat_topics:
-                device_id = self._heartbeat_topics[topic]
-                self._state.update_heartbeat(device_id)
-                logger.debug(f"Heartbeat received from {device_id}")
+            self._state.update_heartbeat(device_id)
 
-                # Try to parse heartbeat payload for additional info
+            # The payload is only logged, so skip formatting and parsing
+            # on paho's network thread unless DEBUG is on
+            if not logger.isEnabledFor(logging.DEBUG):
+                return
+            logger.debug(f"Heartbeat received from {device_id}")
+
+            # Simple heartbeats carry no JSON; only parse object payloads
+            if msg.payload[:1] == b"{":
                 try:
-                    payload = json.loads(msg.payload.decode("utf-8"))
+                    payload = orjson.loads(msg.payload)
                     # Could extract firmware version, uptime, etc. here
                     logger.debug(f"Heartbeat payload: {payload}")
-                except (json.JSONDecodeError, UnicodeDecodeError):
-                    # Simple heartbeat without JSON payload is fine
+                except orjson.JSONDecodeError:
                     pass
 
         except Exception as e:
-            logger.error(f"Error processing MQTT message on {topic}: {e}")
+            logger.error(f"Error processing heartbeat from {device_id}: {e}")
+
+    def _on_message(self, client, userdata, msg):
+        """Handle MQTT messages on topics without a dedicated handler."""
+        logger.debug(f"Ignoring MQTT message on unexpected topic {msg.topic}")
 
     def _backoff_reconnect(self) -> None:
-        """Wait before reconnecting with exponential backoff."""
+        """Wait before reconnecting with exponential backoff and full jitter.
+
+        The actual wait is uniform in [0, delay] so hubs restarting together
+        don't reconnect to the broker in lockstep.
+        """
         if not self._running:
             return
 
-        logger.info(f"Reconnecting in {self._reconnect_delay} seconds...")
-        time.sleep(self._reconnect_delay)
+        wait = random.uniform(0, self._reconnect_delay)
+        logger.info(f"Reconnecting in {wait:.1f} seconds (backoff {self._reconnect_delay}s)...")
+        if self._stopping.wait(timeout=wait):
+            return
 
         # Exponential backoff with max limit
         self._reconnect_delay = min(
@@ -146,43 +204,84 @@ class MqttClient:
             self._config.mqtt.reconnect_delay_max
         )
 
-    def publish(self, topic: str, payload: str, qos: int = 1) -> bool:
-        """Publish a message to an MQTT topic."""
+    def _connected_client(self) -> Optional[mqtt.Client]:
+        """Snapshot the current client if connected.
+
+        Only the snapshot is taken under the lock; paho's publish() is
+        thread-safe, so publishing doesn't contend with reconnects.
+        """
         with self._lock:
             if not self._client or not self._state.is_mqtt_connected():
-                logger.warning(f"Cannot publish to {topic}: not connected")
-                return False
+                return None
+            return self._client
 
-            try:
-                result = self._client.publish(topic, payload, qos=qos)
-                if result.rc == mqtt.MQTT_ERR_SUCCESS:
+    @staticmethod
+    def _publish_with(client: mqtt.Client, topic: str, payload: str | bytes, qos: int) -> bool:
+        """Publish one message on a client snapshot."""
+        try:
+            result = client.publish(topic, payload, qos=qos)
+            if result.rc == mqtt.MQTT_ERR_SUCCESS:
+                # Gated so the payload isn't sliced and formatted per publish
+                if logger.isEnabledFor(logging.DEBUG):
                     logger.debug(f"Published to {topic}: {payload[:100]}...")
-                    return True
-                else:
-                    logger.error(f"Publish failed to {topic}: {result.rc}")
-                    return False
-            except Exception as e:
-                logger.error(f"Publish error to {topic}: {e}")
+                return True
+            else:
+                logger.error(f"Publish failed to {topic}: {result.rc}")
                 return False
+        except Exception as e:
+            logger.error(f"Publish error to {topic}: {e}")
+            return False
 
-    def publish_plan(self, device: DeviceConfig, plan_payload: dict) -> bool:
-        """Publish a lighting plan to a device."""
+    def publish(self, topic: str, payload: str | bytes, qos: int = 1) -> bool:
+        """Publish a message to an MQTT topic."""
+        client = self._connected_client()
+        if client is None:
+            logger.warning(f"Cannot publish to {topic}: not connected")
+            return False
+        return self._publish_with(client, topic, payload, qos)
+
+    def publish_many(self, messages: list[tuple[str, str | bytes]], qos: int = 1) -> list[bool]:
+        """Publish several (topic, payload) messages; returns per-message success."""
+        client = self._connected_client()
+        if client is None:
+            logger.warning(f"Cannot publish {len(messages)} messages: not connected")
+            return [False] * len(messages)
+        return [self._publish_with(client, topic, payload, qos) for topic, payload in messages]
+
+    def publish_plan(self, device: DeviceConfig, plan_payload: dict | str) -> bool:
+        """Publish a lighting plan to a device (a dict, or an already-encoded JSON string)."""
         if not device.topics.set_plan:
             logger.warning(f"No set_plan topic configured for {device.device_id}")
             return False
 
-        payload = json.dumps(plan_payload)
+        payload = plan_payload if isinstance(plan_payload, str) else orjson.dumps(plan_payload)
         return self.publish(device.topics.set_plan, payload)
 
-    def publish_static(self, device: DeviceConfig, values: list[int]) -> bool:
+    def publish_static(self, device: DeviceConfig, values: Sequence[int]) -> bool:
         """Publish static brightness values to a device."""
         if not device.topics.set_static:
             logger.warning(f"No set_static topic configured for {device.device_id}")
             return False
 
-        payload = json.dumps({"values": values})
+        payload = orjson.dumps({"values": values})
         return self.publish(device.topics.set_static, payload)
 
+    def publish_static_batch(self, batch: list[tuple[DeviceConfig, Sequence[int]]]) -> int:
+        """Publish static values to several devices with one client snapshot.
+
+        Returns the number of messages successfully queued.
+        """
+        messages = []
+        for device, values in batch:
+            if not device.topics.set_static:
+                logger.warning(f"No set_static topic configured for {device.device_id}")
+                continue
+            messages.append((device.topics.set_static, orjson.dumps({"values": values})))
+
+        if not messages:
+            return 0
+        return sum(self.publish_many(messages))
+
     def is_connected(self) -> bool:
         """Check if MQTT is connected."""
         return self._state.is_mqtt_connected()
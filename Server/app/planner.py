@@ -1,10 +1,12 @@
 """Planner loop for generating and publishing lighting plans."""
 
 import logging
-import math
 import threading
 import time
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import orjson
 
 from app.config import AppConfig
 from app.state import SharedState, DeviceMode
@@ -56,7 +58,8 @@ class PlannerLoop:
         logger.info(f"Planner loop started with interval: {interval}s")
 
         while self._running:
-            loop_start = time.time()
+            # Monotonic clock for pacing: immune to NTP steps of the wall clock
+            loop_start = time.monotonic()
 
             try:
                 self._process_planned_devices()
@@ -64,7 +67,7 @@ class PlannerLoop:
                 logger.error(f"Planner loop error: {e}")
 
             # Sleep for the remainder of the interval
-            elapsed = time.time() - loop_start
+            elapsed = time.monotonic() - loop_start
             sleep_time = max(0, interval - elapsed)
             if sleep_time > 0:
                 time.sleep(sleep_time)
@@ -80,143 +83,128 @@ class PlannerLoop:
         # Calculate timestamp for T+1 (next interval)
         # Note: time.time() returns UTC Unix timestamp (seconds since epoch)
         # ESP devices must also use UTC (configTime(0, 0, ...)) for synchronization
-        current_time = time.time()
         interval = self._config.planner.interval_sec
         
-        # Round up to next interval boundary for T+1
-        next_interval_start = math.ceil(current_time / interval) * interval + interval
-        timestamp = int(next_interval_start)  # UTC Unix timestamp
+        # Start of the interval after the next boundary (T+1), in integer math
+        timestamp = (int(time.time()) // interval + 2) * interval  # UTC Unix timestamp
 
+        # Build every payload first, then hand them to MQTT in one batch
+        device_ids = []
+        messages = []
         for device_id in planned_device_ids:
             try:
-                self._publish_plan_for_device(device_id, timestamp)
+                message = self._build_plan_message(device_id, timestamp)
             except Exception as e:
-                logger.error(f"Failed to publish plan for {device_id}: {e}")
+                logger.error(f"Failed to build plan for {device_id}: {e}")
+                self._state.increment_device_error(device_id)
+                continue
+            if message:
+                device_ids.append(device_id)
+                messages.append(message)
+
+        if not messages:
+            return
+
+        results = self._mqtt.publish_many(messages)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for device_id, success in zip(device_ids, results):
+            if success:
+                if debug:
+                    logger.debug(f"Published plan for {device_id}: timestamp={timestamp}")
+            else:
+                logger.warning(f"Failed to publish plan for {device_id}")
                 self._state.increment_device_error(device_id)
 
-    def _publish_plan_for_device(self, device_id: str, timestamp: int) -> None:
-        """Generate and publish a plan for a single device."""
+    def _build_plan_message(self, device_id: str, timestamp: int) -> Optional[tuple[str, str]]:
+        """Generate the plan for a single device as a (topic, payload) pair."""
         device_config = self._config.get_device_by_id(device_id)
         if not device_config:
             logger.warning(f"Device config not found: {device_id}")
-            return
+            return None
+
+        if not device_config.topics.set_plan:
+            logger.warning(f"No set_plan topic configured for {device_id}")
+            self._state.increment_device_error(device_id)
+            return None
 
-        device_state = self._state.get_device_state(device_id)
-        if not device_state:
+        # Plan and static values come from one locked snapshot
+        effective = self._state.get_effective_state(device_id)
+        if not effective:
             logger.warning(f"Device state not found: {device_id}")
-            return
+            return None
 
         # Get the selected plan for this device
-        plan_id = self._state.get_device_plan(device_id)
+        plan_id = effective.planned_plan_id
         
         if plan_id:
             # Use the selected plan
             plan = self._plan_cache.get(plan_id)
             if plan:
-                sequence, interval_ms = self._get_plan_sequence(device_id, plan)
+                step_jsons, interval_ms = self._get_plan_sequence(device_id, plan)
             else:
                 logger.warning(f"Plan not found for device {device_id}: {plan_id}")
                 # Fallback to static values
-                sequence = self._generate_sequence(device_state.static_values)
+                step_jsons = self._static_steps(effective.static_values)
                 interval_ms = self._config.planner.interval_ms
         else:
             # No plan selected - use static values
-            sequence = self._generate_sequence(device_state.static_values)
+            step_jsons = self._static_steps(effective.static_values)
             interval_ms = self._config.planner.interval_ms
 
-        # Build the plan payload based on configured version
+        # Build the plan payload based on configured version. Steps arrive
+        # pre-encoded, so only the timestamps are formatted per tick.
         payload_version = self._config.planner.plan_payload_version
         
         if payload_version == 2:
             # V2 format: per-step absolute timestamps with values
             start_ms = timestamp * 1000  # Convert seconds to milliseconds
-            steps = []
-            for i, values in enumerate(sequence):
-                steps.append({
-                    "ts_ms": start_ms + (i * interval_ms),
-                    "values": values
-                })
-            plan_payload = {
-                "format_version": 2,
-                "steps": steps
-            }
+            steps_json = ",".join(
+                f'{{"ts_ms":{start_ms + i * interval_ms},"values":{values_json}}}'
+                for i, values_json in enumerate(step_jsons)
+            )
+            plan_payload = f'{{"format_version":2,"steps":[{steps_json}]}}'
         else:
             # V1 format: legacy packed format (timestamp + interval_ms + sequence)
-            plan_payload = {
-                "timestamp": timestamp,
-                "interval_ms": interval_ms,
-                "sequence": sequence,
-            }
-
-        # Publish via MQTT
-        success = self._mqtt.publish_plan(device_config, plan_payload)
-        if success:
-            logger.debug(f"Published plan v{payload_version} for {device_id}: timestamp={timestamp}")
-        else:
-            logger.warning(f"Failed to publish plan for {device_id}")
-            self._state.increment_device_error(device_id)
+            plan_payload = (
+                f'{{"timestamp":{timestamp},"interval_ms":{interval_ms},'
+                f'"sequence":[{_join_steps(step_jsons)}]}}'
+            )
+
+        return device_config.topics.set_plan, plan_payload
 
-    def _get_plan_sequence(self, device_id: str, plan: Plan) -> tuple[list[list[int]], int]:
+    def _get_plan_sequence(self, device_id: str, plan: Plan) -> tuple[tuple[str, ...], int]:
         """
         Get the next sequence of steps from the plan for this device.
         
         Loops through the plan's steps, advancing the step index each tick.
-        Converts intensity from 0-100 to 0-255 for devices.
+        Steps are the plan's cached 0-255 device values, already JSON-encoded.
         
         Returns:
-            Tuple of (sequence, interval_ms)
+            Tuple of (JSON-encoded steps, interval_ms)
         """
         steps_per_interval = self._config.planner.steps_per_interval
         
-        # Get or initialize step index for this device
-        if device_id not in self._device_step_index:
-            self._device_step_index[device_id] = 0
-        
-        current_index = self._device_step_index[device_id]
-        plan_steps = plan.steps
-        num_plan_steps = len(plan_steps)
+        # Step index for this device; new devices start at the beginning
+        current_index = self._device_step_index.get(device_id, 0)
+        num_plan_steps = len(plan.steps)
         
         if num_plan_steps == 0:
             # Empty plan, return zeros
-            return [[0] * plan.channels for _ in range(steps_per_interval)], plan.interval_ms
+            return _encode_static_steps((0,) * plan.channels, steps_per_interval), plan.interval_ms
         
-        # Extract the next steps_per_interval steps from the plan, wrapping around
-        sequence = []
-        for i in range(steps_per_interval):
-            step_idx = (current_index + i) % num_plan_steps
-            raw_step = plan_steps[step_idx]
-            # Convert 0-100 to 0-255
-            converted_step = [int(round(v * 255 / 100)) for v in raw_step]
-            sequence.append(converted_step)
+        # The next steps_per_interval steps from the plan, wrapping around.
+        # Already converted from 0-100 to 0-255 and encoded; windows are
+        # memoized on the plan since a looping plan revisits the same ones.
+        sequence = plan.step_window(current_index, steps_per_interval)
         
         # Advance the step index for next tick
         self._device_step_index[device_id] = (current_index + steps_per_interval) % num_plan_steps
         
         return sequence, plan.interval_ms
 
-    def _generate_sequence(self, target_values: list[int]) -> list[list[int]]:
-        """
-        Generate a sequence of brightness values for the interval.
-        
-        This is a simple implementation that holds the target values constant.
-        More sophisticated implementations could:
-        - Interpolate between current and target values
-        - Apply easing functions
-        - Follow a schedule/scene timeline
-        
-        Returns:
-            List of [ch0, ch1, ...] values for each step in the interval.
-            Length = steps_per_interval
-        """
-        steps = self._config.planner.steps_per_interval
-
-        # For now, just repeat the target values for all steps
-        # Each step is a list of channel values
-        sequence = []
-        for _ in range(steps):
-            sequence.append(target_values.copy())
-
-        return sequence
+    def _static_steps(self, target_values: Sequence[int]) -> tuple[str, ...]:
+        """JSON-encoded steps holding target_values, shared across ticks and devices."""
+        return _encode_static_steps(tuple(target_values), self._config.planner.steps_per_interval)
 
     def generate_transition_sequence(
         self,
@@ -235,26 +223,7 @@ class PlannerLoop:
         Returns:
             List of [ch0, ch1, ...] values for each step
         """
-        if steps is None:
-            steps = self._config.planner.steps_per_interval
-
-        if len(start_values) != len(end_values):
-            raise ValueError("start_values and end_values must have same length")
-
-        num_channels = len(start_values)
-        sequence = []
-
-        for step in range(steps):
-            # Linear interpolation
-            t = step / (steps - 1) if steps > 1 else 1.0
-            step_values = []
-            for ch in range(num_channels):
-                value = int(start_values[ch] + t * (end_values[ch] - start_values[ch]))
-                value = max(0, min(255, value))
-                step_values.append(value)
-            sequence.append(step_values)
-
-        return sequence
+        return self.generate_eased_sequence(start_values, end_values, steps, ease_type="linear")
 
     def generate_eased_sequence(
         self,
@@ -281,31 +250,53 @@ class PlannerLoop:
         if len(start_values) != len(end_values):
             raise ValueError("start_values and end_values must have same length")
 
-        num_channels = len(start_values)
-        sequence = []
+        # Normalized time (0 to 1) for each step, with easing applied once
+        ease = _EASINGS.get(ease_type, _ease_linear)
+        times = [ease(step / (steps - 1) if steps > 1 else 1.0) for step in range(steps)]
+
+        # Per-channel deltas are loop-invariant
+        channels = list(zip(start_values, [e - s for s, e in zip(start_values, end_values)]))
+
+        return [
+            [max(0, min(255, int(start + t * delta))) for start, delta in channels]
+            for t in times
+        ]
+
+
+@lru_cache(maxsize=1024)
+def _encode_static_steps(target_values: tuple[int, ...], steps: int) -> tuple[str, ...]:
+    """Encode a constant sequence once; idle devices repeat the same values every tick."""
+    return (orjson.dumps(target_values).decode(),) * steps
+
+
+@lru_cache(maxsize=4096)
+def _join_steps(step_jsons: tuple[str, ...]) -> str:
+    """Comma-join encoded steps; windows repeat across ticks so the result is reused."""
+    return ",".join(step_jsons)
+
+
+def _ease_linear(t: float) -> float:
+    return t
+
+
+def _ease_in(t: float) -> float:
+    return t * t
+
+
+def _ease_out(t: float) -> float:
+    return 1 - (1 - t) * (1 - t)
+
+
+def _ease_in_out(t: float) -> float:
+    if t < 0.5:
+        return 2 * t * t
+    return 1 - (-2 * t + 2) ** 2 / 2
 
-        for step in range(steps):
-            # Calculate normalized time (0 to 1)
-            t = step / (steps - 1) if steps > 1 else 1.0
-            
-            # Apply easing function
-            if ease_type == "ease_in":
-                t = t * t
-            elif ease_type == "ease_out":
-                t = 1 - (1 - t) * (1 - t)
-            elif ease_type == "ease_in_out":
-                if t < 0.5:
-                    t = 2 * t * t
-                else:
-                    t = 1 - (-2 * t + 2) ** 2 / 2
-            # else: linear, no modification
-
-            step_values = []
-            for ch in range(num_channels):
-                value = int(start_values[ch] + t * (end_values[ch] - start_values[ch]))
-                value = max(0, min(255, value))
-                step_values.append(value)
-            sequence.append(step_values)
-
-        return sequence
 
+# Easing functions by name; unknown names fall back to linear
+_EASINGS = {
+    "linear": _ease_linear,
+    "ease_in": _ease_in,
+    "ease_out": _ease_out,
+    "ease_in_out": _ease_in_out,
+}
@@ -1,15 +1,18 @@
 """Plans storage and validation for the Lighting Control Hub."""
 
-import json
 import logging
 import os
 import re
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
 from typing import Optional
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 # Constants
@@ -18,6 +21,15 @@ VALID_MODES = {"4ch_v1"}
 MODE_CHANNEL_COUNT = {"4ch_v1": 4}
 
 
+def _to_device_level(value: float) -> int:
+    """Convert a 0-100 intensity to a 0-255 device value."""
+    return int(round(value * 255 / 100))
+
+
+# Lookup table for the integer intensities validate_plan/save_plan produce
+_DEVICE_LEVELS = {v: _to_device_level(v) for v in range(101)}
+
+
 @dataclass
 class PlanMetadata:
     """Lightweight plan info for listing."""
@@ -69,6 +81,38 @@ class Plan:
             "updated_at": self.updated_at,
         }
 
+    @cached_property
+    def device_steps(self) -> list[list[int]]:
+        """Steps converted from 0-100 intensity to 0-255 device values (computed once)."""
+        try:
+            return [[_DEVICE_LEVELS[v] for v in step] for step in self.steps]
+        except (KeyError, TypeError):
+            # Hand-edited file with fractional or out-of-range values
+            return [[_to_device_level(v) for v in step] for step in self.steps]
+
+    @cached_property
+    def device_steps_json(self) -> list[str]:
+        """JSON encoding of each device step, spliced into MQTT plan payloads."""
+        return [orjson.dumps(step).decode() for step in self.device_steps]
+
+    @cached_property
+    def _step_windows(self) -> dict[tuple[int, int], tuple[str, ...]]:
+        return {}
+
+    def step_window(self, start: int, count: int) -> tuple[str, ...]:
+        """count encoded device steps from start, wrapping around (memoized per window)."""
+        key = (start, count)
+        window = self._step_windows.get(key)
+        if window is None:
+            device_steps = self.device_steps_json
+            num_steps = len(device_steps)
+            if start + count <= num_steps:
+                window = tuple(device_steps[start:start + count])
+            else:
+                window = tuple(device_steps[(start + i) % num_steps] for i in range(count))
+            self._step_windows[key] = window
+        return window
+
     def to_metadata(self) -> PlanMetadata:
         return PlanMetadata(
             plan_id=self.plan_id,
@@ -158,21 +202,66 @@ def validate_plan(data: dict) -> None:
         raise PlanValidationError("name must be 100 characters or less")
 
 
+# Listing cache: file name -> ((mtime_ns, size), metadata)
+_metadata_cache: dict[str, tuple[tuple[int, int], PlanMetadata]] = {}
+# Plan files are small, so parsing is dominated by open/read latency
+_LIST_PLANS_WORKERS = 8
+
+
+def _load_metadata(path: str) -> Optional[PlanMetadata]:
+    """Read one plan file's metadata, or None if it can't be parsed."""
+    try:
+        with open(path, "rb") as f:
+            data = orjson.loads(f.read())
+        return _dict_to_plan(data).to_metadata()
+    except Exception as e:
+        logger.warning(f"Failed to load plan {path}: {e}")
+        return None
+
+
 def list_plans() -> list[PlanMetadata]:
-    """List all available plans."""
+    """List all available plans.
+
+    Only files whose mtime or size changed since the last listing are
+    re-read; unchanged plans reuse their cached metadata. Changed files are
+    read in parallel.
+    """
+    global _metadata_cache
     _ensure_plans_dir()
-    plans = []
+    seen: dict[str, tuple[tuple[int, int], PlanMetadata]] = {}
+    stale: list[tuple[str, str, tuple[int, int]]] = []  # (name, path, key)
+
+    with os.scandir(PLANS_DIR) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            try:
+                st = entry.stat()
+            except OSError as e:
+                logger.warning(f"Failed to load plan {entry.path}: {e}")
+                continue
+            key = (st.st_mtime_ns, st.st_size)
+            cached = _metadata_cache.get(entry.name)
+            if cached and cached[0] == key:
+                seen[entry.name] = cached
+            else:
+                stale.append((entry.name, entry.path, key))
+
+    if len(stale) > 1:
+        with ThreadPoolExecutor(max_workers=min(_LIST_PLANS_WORKERS, len(stale))) as executor:
+            loaded = list(executor.map(_load_metadata, [path for _, path, _ in stale]))
+    else:
+        loaded = [_load_metadata(path) for _, path, _ in stale]
 
-    for file_path in PLANS_DIR.glob("*.json"):
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            plan = _dict_to_plan(data)
-            plans.append(plan.to_metadata())
-        except Exception as e:
-            logger.warning(f"Failed to load plan {file_path}: {e}")
+    for (name, _, key), metadata in zip(stale, loaded):
+        if metadata is not None:
+            seen[name] = (key, metadata)
+
+    # Drop entries for deleted files
+    _metadata_cache = seen
 
     # Sort by updated_at descending
+    plans = [metadata for _, metadata in seen.values()]
     plans.sort(key=lambda p: p.updated_at, reverse=True)
     return plans
 
@@ -186,8 +275,8 @@ def load_plan(plan_id: str) -> Optional[Plan]:
         return None
 
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(path, "rb") as f:
+            data = orjson.loads(f.read())
         return _dict_to_plan(data)
     except Exception as e:
         logger.error(f"Failed to load plan {plan_id}: {e}")
@@ -246,11 +335,17 @@ def save_plan(data: dict, plan_id: Optional[str] = None) -> Plan:
         updated_at=now,
     )
 
-    # Write to file
+    # Write to a temp file and rename over the plan, so readers never see a
+    # partially written file
     path = _get_plan_path(final_id)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(plan.to_dict(), f, indent=2)
-
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(plan.to_dict(), option=orjson.OPT_INDENT_2))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    get_plan_cache().invalidate(final_id)
     logger.info(f"Saved plan: {final_id}")
     return plan
 
@@ -261,6 +356,7 @@ def delete_plan(plan_id: str) -> bool:
     if path.exists():
         try:
             path.unlink()
+            get_plan_cache().invalidate(plan_id)
             logger.info(f"Deleted plan: {plan_id}")
             return True
         except Exception as e:
@@ -289,47 +385,73 @@ class PlanCache:
     Thread-safe cache for plans with mtime-based invalidation.
     
     Used by the planner to avoid re-reading plans from disk every tick.
+    The mapping is copy-on-write: writers serialize on the lock and publish a
+    new dict, so readers never take the lock.
     """
 
-    def __init__(self, ttl_seconds: float = 5.0):
+    def __init__(self, ttl_seconds: float = 5.0, stat_interval_seconds: float = 0.5):
         self._lock = threading.Lock()
-        self._cache: dict[str, tuple[Plan, float, float]] = {}  # plan_id -> (plan, mtime, cached_at)
+        # plan_id -> (plan, mtime, cached_at, checked_at); never mutated once published
+        self._cache: dict[str, tuple[Plan, float, float, float]] = {}
         self._ttl = ttl_seconds
+        self._stat_interval = stat_interval_seconds
 
     def get(self, plan_id: str) -> Optional[Plan]:
         """Get a plan from cache, reloading if stale."""
+        # Fast path: a recently checked entry is returned without touching the
+        # disk or the lock. save_plan/delete_plan invalidate explicitly, so only
+        # external edits wait up to stat_interval to be noticed.
+        cached = self._cache.get(plan_id)
+        if cached and time.monotonic() - cached[3] < self._stat_interval:
+            return cached[0]
+
         with self._lock:
             cached = self._cache.get(plan_id)
             path = _get_plan_path(plan_id)
 
-            if not path.exists():
+            try:
+                current_mtime = path.stat().st_mtime
+            except FileNotFoundError:
                 # Plan was deleted
-                self._cache.pop(plan_id, None)
+                self._discard(plan_id)
                 return None
 
-            current_mtime = path.stat().st_mtime
-
+            now = time.monotonic()
             if cached:
-                plan, cached_mtime, cached_at = cached
+                plan, cached_mtime, cached_at, _ = cached
                 # Check if file was modified or cache expired
-                if cached_mtime == current_mtime and (time.time() - cached_at) < self._ttl:
+                if cached_mtime == current_mtime and (now - cached_at) < self._ttl:
+                    self._publish(plan_id, (plan, cached_mtime, cached_at, now))
                     return plan
 
             # Reload from disk
             plan = load_plan(plan_id)
             if plan:
-                self._cache[plan_id] = (plan, current_mtime, time.time())
+                self._publish(plan_id, (plan, current_mtime, now, now))
             return plan
 
+    def _publish(self, plan_id: str, entry: tuple[Plan, float, float, float]) -> None:
+        """Swap in a copy of the cache with entry set. Caller holds the lock."""
+        cache = dict(self._cache)
+        cache[plan_id] = entry
+        self._cache = cache
+
+    def _discard(self, plan_id: str) -> None:
+        """Swap in a copy of the cache without plan_id. Caller holds the lock."""
+        if plan_id in self._cache:
+            cache = dict(self._cache)
+            del cache[plan_id]
+            self._cache = cache
+
     def invalidate(self, plan_id: str) -> None:
         """Remove a plan from cache."""
         with self._lock:
-            self._cache.pop(plan_id, None)
+            self._discard(plan_id)
 
     def clear(self) -> None:
         """Clear the entire cache."""
         with self._lock:
-            self._cache.clear()
+            self._cache = {}
 
 
 # Global cache instance
@@ -343,3 +465,7 @@ def get_plan_cache() -> PlanCache:
         _plan_cache = PlanCache()
     return _plan_cache
 
+
+def plan_exists(plan_id: str) -> bool:
+    """Check whether a loadable plan exists, using the shared plan cache."""
+    return get_plan_cache().get(plan_id) is not None
@@ -1,35 +1,65 @@
 """Thread-safe shared state for the Lighting Control Hub."""
 
-import json
+import hashlib
+import itertools
 import threading
 import time
+from collections import deque
 from dataclasses import dataclass, field
-from enum import Enum
-from typing import Optional
+from enum import StrEnum
+from typing import Iterable, Optional, Sequence
+
+import orjson
 
 from app.config import AppConfig, DeviceConfig
 
 
-class DeviceMode(Enum):
+# Queued repeater frames kept before the oldest are dropped
+PENDING_FAST_FRAMES = 256
+
+
+class DeviceMode(StrEnum):
     """Operating mode for a device."""
     STATIC = "static"
     PLANNED = "planned"
     FAST = "fast"
 
 
-class RoomControlMode(Enum):
+class RoomControlMode(StrEnum):
     """Control mode for a room (AUTO broadcasts to all devices, MANUAL allows per-device control)."""
     AUTO = "auto"
     MANUAL = "manual"
 
 
-class FastModeType(Enum):
+class FastModeType(StrEnum):
     """Type of fast mode operation."""
     INTERNAL = "internal"  # Server-controlled values
     UDP_REPEATER = "udp_repeater"  # Server relays external UDP frames
 
 
-@dataclass
+def _channel_bytes(values: Sequence[int], channels: Optional[int] = None) -> bytearray:
+    """Clamp values to 0-255 and pad/truncate to channels (if given), one byte per channel."""
+    if isinstance(values, (bytes, bytearray)):
+        # Already bytes (e.g. UDP repeater frames): in range by construction
+        clamped = bytearray(values)
+    else:
+        clamped = bytearray(max(0, min(255, int(v))) for v in values)
+    if channels is not None:
+        if len(clamped) < channels:
+            clamped += bytes(channels - len(clamped))
+        elif len(clamped) > channels:
+            del clamped[channels:]
+    return clamped
+
+
+def _frozen_channel_bytes(values: Sequence[int], channels: int) -> bytes:
+    """Immutable _channel_bytes; bytes already of the right length are kept as-is."""
+    if type(values) is bytes and len(values) == channels:
+        return values
+    return bytes(_channel_bytes(values, channels))
+
+
+@dataclass(slots=True)
 class RoomControlState:
     """Runtime control state for a room (used in AUTO mode)."""
     room_name: str
@@ -37,23 +67,37 @@ class RoomControlState:
     
     # Shared room settings (applied to all devices when in AUTO mode)
     mode: DeviceMode = DeviceMode.STATIC
-    static_values: list[int] = field(default_factory=lambda: [0, 0, 0, 0])
+    # One byte per channel (0-255); converted to lists at the API boundary
+    static_values: bytearray = field(default_factory=lambda: bytearray(4))
     planned_plan_id: Optional[str] = None
     fast_mode_type: FastModeType = FastModeType.INTERNAL
-    
-    def to_dict(self) -> dict:
-        """Convert to dictionary for JSON serialization."""
-        return {
-            "room_name": self.room_name,
-            "control_mode": self.control_mode.value,
-            "mode": self.mode.value,
-            "static_values": self.static_values.copy(),
-            "planned_plan_id": self.planned_plan_id,
-            "fast_mode_type": self.fast_mode_type.value,
-        }
 
+    # Last to_dict() result; dropped by mark_dirty() whenever a field changes
+    _dict_cache: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
 
-@dataclass
+    def mark_dirty(self) -> None:
+        """Invalidate the cached to_dict() result (call after mutating)."""
+        self._dict_cache = None
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization.
+
+        The result is cached until the next mutation and must be treated as
+        read-only.
+        """
+        if self._dict_cache is None:
+            self._dict_cache = {
+                "room_name": self.room_name,
+                "control_mode": self.control_mode,
+                "mode": self.mode,
+                "static_values": list(self.static_values),
+                "planned_plan_id": self.planned_plan_id,
+                "fast_mode_type": self.fast_mode_type,
+            }
+        return self._dict_cache
+
+
+@dataclass(slots=True)
 class DeviceState:
     """Runtime state for a single device."""
     device_id: str
@@ -67,8 +111,10 @@ class DeviceState:
 
     # Mode and values (per-device settings, used in MANUAL mode or as overrides)
     mode: DeviceMode = DeviceMode.STATIC
-    static_values: list[int] = field(default_factory=list)
-    fast_values: list[int] = field(default_factory=list)
+    # One byte per channel (0-255); converted to lists at the API boundary
+    static_values: bytearray = field(default_factory=bytearray)
+    # Immutable and replaced per update, so readers and the wire share it uncopied
+    fast_values: bytes = b""
 
     # Planned mode: selected plan ID (memory-only)
     planned_plan_id: Optional[str] = None
@@ -77,23 +123,26 @@ class DeviceState:
     fast_mode_type: FastModeType = FastModeType.INTERNAL
 
     # Connectivity
-    last_heartbeat: float = 0.0
+    last_heartbeat: float = 0.0  # Wall clock, for display
+    last_heartbeat_mono: float = 0.0  # Monotonic clock, for timeouts
     online: bool = False
 
     # Error tracking
     error_count: int = 0
     reconnect_count: int = 0
 
+    # Last to_dict() result; dropped by mark_dirty() whenever a field changes
+    _dict_cache: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+    # to_dict() fields fixed by the config, built once in __post_init__
+    _config_fields: dict = field(init=False, repr=False, compare=False)
+
     def __post_init__(self):
         """Initialize channel arrays if empty."""
         if not self.static_values:
-            self.static_values = [0] * self.channels
+            self.static_values = bytearray(self.channels)
         if not self.fast_values:
-            self.fast_values = [0] * self.channels
-
-    def to_dict(self) -> dict:
-        """Convert to dictionary for JSON serialization."""
-        return {
+            self.fast_values = bytes(self.channels)
+        self._config_fields = {
             "device_id": self.device_id,
             "room": self.room,
             "ip": self.ip,
@@ -102,65 +151,205 @@ class DeviceState:
             "channels": self.channels,
             "channel_labels": list(self.channel_labels),
             "firmware_version": self.firmware_version,
-            "mode": self.mode.value,
-            "static_values": self.static_values.copy(),
-            "fast_values": self.fast_values.copy(),
+        }
+
+    def mark_dirty(self) -> None:
+        """Invalidate the cached to_dict() result (call after mutating)."""
+        self._dict_cache = None
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization.
+
+        The result is cached until the next mutation and must be treated as
+        read-only.
+        """
+        if self._dict_cache is not None:
+            return self._dict_cache
+        self._dict_cache = {
+            **self._config_fields,
+            "mode": self.mode,
+            "static_values": list(self.static_values),
+            "fast_values": list(self.fast_values),
             "planned_plan_id": self.planned_plan_id,
-            "fast_mode_type": self.fast_mode_type.value,
+            "fast_mode_type": self.fast_mode_type,
             "online": self.online,
             "last_heartbeat": self.last_heartbeat,
             "error_count": self.error_count,
             "reconnect_count": self.reconnect_count,
         }
+        return self._dict_cache
+
+
+@dataclass(frozen=True, slots=True)
+class EffectiveState:
+    """Snapshot of the settings a device actually runs with (considers room AUTO mode)."""
+    mode: DeviceMode
+    static_values: bytes
+    planned_plan_id: Optional[str]
+    fast_mode_type: FastModeType
+    channels: int
+    ip: str
+    udp_port: int
+
+
+class _ReadWriteLock:
+    """Reader/writer lock with writer preference.
+
+    Any number of readers may hold the lock together; a writer is exclusive.
+    The write side is reentrant, and the writing thread may also take the
+    read side. The read side is not reentrant: a reader must not re-acquire
+    it, or it can deadlock behind a waiting writer.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None  # thread ident of the writer
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._read_ctx = _LockSide(self.acquire_read, self.release_read)
+        self._write_ctx = _LockSide(self.acquire_write, self.release_write)
+
+    def acquire_read(self) -> None:
+        with self._cond:
+            if self._writer == threading.get_ident():
+                # Reading inside our own write section
+                self._write_depth += 1
+                return
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        with self._cond:
+            if self._writer == threading.get_ident():
+                self._write_depth -= 1
+                return
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            self._writers_waiting += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    def read(self) -> "_LockSide":
+        """Context manager for the shared (read) side."""
+        return self._read_ctx
+
+    def write(self) -> "_LockSide":
+        """Context manager for the exclusive (write) side."""
+        return self._write_ctx
+
+
+class _LockSide:
+    """Context manager binding one side of a _ReadWriteLock."""
+    __slots__ = ("_acquire", "_release")
+
+    def __init__(self, acquire, release):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self) -> None:
+        self._acquire()
+
+    def __exit__(self, *exc) -> None:
+        self._release()
 
 
 class SharedState:
     """Thread-safe shared state manager."""
 
     def __init__(self):
-        self._lock = threading.RLock()
+        # Getters share the read side; anything that mutates takes the write side
+        self._lock = _ReadWriteLock()
         self._devices: dict[str, DeviceState] = {}
+        # Device IDs in config order; the device set only changes on (re)initialize
+        self._device_ids: tuple[str, ...] = ()
         self._rooms: dict[str, RoomControlState] = {}  # room_name -> RoomControlState
+        self._room_devices: dict[str, tuple[str, ...]] = {}  # room_name -> device IDs
+        # mode -> device IDs; rebuilt on first lookup after any mode change
+        self._mode_devices: Optional[dict[DeviceMode, tuple[str, ...]]] = None
+        # Effective fast mode type -> IDs of devices in fast mode; rebuilt on
+        # first lookup after any mode, fast mode type or room control change
+        self._fast_type_devices: Optional[dict[FastModeType, tuple[str, ...]]] = None
         self._heartbeat_timeout: float = 10.0
         self._mqtt_connected: bool = False
+        # (device_id, wall time, monotonic time) per heartbeat; appended without
+        # the lock and applied in one batch by the next status read
+        self._pending_heartbeats: deque[tuple[str, float, float]] = deque()
+        # Per-frame fast value batches queued by the UDP repeater, applied the
+        # same way; bounded since only the newest values per device matter
+        self._pending_fast_values: deque[Sequence[tuple[str, Sequence[int]]]] = deque(
+            maxlen=PENDING_FAST_FRAMES
+        )
+        # next() on a count is atomic under the GIL, so errors are counted lock-free
+        self._mqtt_errors = itertools.count(1)
         self._mqtt_error_count: int = 0
         # State versioning for change detection
         self._state_version: int = 0
-        self._last_broadcast_hash: str = ""
-        self._last_broadcast_version: int = 0
+        self._last_broadcast_version: int = -1
+        # Immutable snapshot of every device's status dict, swapped out (set to
+        # None) on any device change and rebuilt by the next reader
+        self._status_snapshot: Optional[tuple[dict, ...]] = None
+        # JSON encoding of a status snapshot
+        self._status_json: Optional[tuple[tuple[dict, ...], bytes]] = None
+        # HTTP ETag of a status encoding
+        self._status_etag: Optional[tuple[bytes, str]] = None
 
     def _increment_version(self) -> None:
-        """Increment the state version (call within lock)."""
+        """Increment the state version (call within the write lock)."""
         self._state_version += 1
 
-    def _compute_state_hash(self, state_data: list[dict]) -> str:
-        """Compute a hash of the state data for change detection."""
-        return json.dumps(state_data, sort_keys=True)
-
     def has_state_changed(self) -> bool:
-        """Check if state has changed since last broadcast."""
-        with self._lock:
-            current_state = self.get_all_device_status()
-            current_hash = self._compute_state_hash(current_state)
-            return current_hash != self._last_broadcast_hash
-
-    def mark_broadcast_complete(self, state_data: list[dict]) -> None:
-        """Mark the current state as broadcast (for change detection)."""
-        with self._lock:
-            self._last_broadcast_hash = self._compute_state_hash(state_data)
-            self._last_broadcast_version = self._state_version
+        """Check if state has changed since last broadcast.
+
+        Every observable mutation bumps the version, so comparing versions is
+        enough. Heartbeat timestamps alone don't bump it; an online/offline
+        flip does.
+        """
+        self._refresh_online_status()
+        return self._state_version != self._last_broadcast_version
+
+    def mark_broadcast_complete(self, version: int) -> None:
+        """Mark state up to version as broadcast (for change detection).
+
+        Pass the version read before taking the broadcast snapshot, so changes
+        racing with the broadcast are picked up by the next check.
+        """
+        with self._lock.write():
+            self._last_broadcast_version = version
 
     def get_state_version(self) -> int:
         """Get the current state version number."""
-        with self._lock:
-            return self._state_version
+        # Single attribute reads are atomic; no lock round-trip needed
+        return self._state_version
 
     def initialize_from_config(self, config: AppConfig) -> None:
         """Initialize device states from configuration."""
-        with self._lock:
+        with self._lock.write():
             self._heartbeat_timeout = float(config.mqtt.heartbeat_timeout_sec)
             self._devices.clear()
             self._rooms.clear()
+            self._room_devices.clear()
+            self._pending_heartbeats.clear()
+            self._pending_fast_values.clear()
 
             for room in config.rooms:
                 # Initialize room control state
@@ -168,7 +357,7 @@ class SharedState:
                 max_channels = max((d.channels for d in room.devices), default=4)
                 self._rooms[room.name] = RoomControlState(
                     room_name=room.name,
-                    static_values=[0] * max_channels,
+                    static_values=bytearray(max_channels),
                 )
                 
                 for device in room.devices:
@@ -181,19 +370,30 @@ class SharedState:
                         channels=device.channels,
                         channel_labels=device.channel_labels,
                         firmware_version=device.firmware_version,
-                        static_values=[0] * device.channels,
-                        fast_values=[0] * device.channels,
+                        static_values=bytearray(device.channels),
+                        fast_values=bytes(device.channels),
                     )
+
+            # Index device IDs by room so room operations don't scan all devices
+            room_devices: dict[str, list[str]] = {name: [] for name in self._rooms}
+            for device_id, device in self._devices.items():
+                room_devices[device.room].append(device_id)
+            self._room_devices = {name: tuple(ids) for name, ids in room_devices.items()}
+            self._device_ids = tuple(self._devices)
+            self._mode_devices = None
+            self._fast_type_devices = None
+            self._status_snapshot = None
             self._increment_version()
 
     def get_device_ids(self) -> list[str]:
         """Get list of all device IDs."""
-        with self._lock:
-            return list(self._devices.keys())
+        # The tuple is replaced wholesale on initialize, so no lock is needed
+        return list(self._device_ids)
 
     def get_device_state(self, device_id: str) -> Optional[DeviceState]:
         """Get a copy of a device's state (not thread-safe for modifications)."""
-        with self._lock:
+        self._refresh_online_status()
+        with self._lock.read():
             device = self._devices.get(device_id)
             if device:
                 # Return a shallow copy for reading
@@ -202,148 +402,296 @@ class SharedState:
 
     def get_device_status(self, device_id: str) -> Optional[dict]:
         """Get device status as a dictionary."""
-        with self._lock:
+        self._refresh_online_status()
+        with self._lock.read():
             device = self._devices.get(device_id)
             if device:
-                self._update_online_status(device)
                 return device.to_dict()
             return None
 
     def get_all_device_status(self) -> list[dict]:
         """Get status of all devices."""
-        with self._lock:
-            result = []
+        self._refresh_online_status()
+        return list(self._status_tuple())
+
+    def get_all_device_status_snapshot(self) -> tuple[list[dict], bytes]:
+        """Get status of all devices along with its JSON encoding.
+
+        The encoding is reused until a device changes, so repeated polls and
+        broadcasts serialize only once.
+        """
+        self._refresh_online_status()
+        snapshot, body = self._encoded_status()
+        return list(snapshot), body
+
+    def get_all_device_status_etag(self) -> tuple[bytes, str]:
+        """Get the JSON encoding of all device status along with its ETag.
+
+        The tag is hashed once per encoding, so polls between changes reuse it.
+        """
+        self._refresh_online_status()
+        _, body = self._encoded_status()
+        cached = self._status_etag
+        if cached is not None and cached[0] is body:
+            return body, cached[1]
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        # Benign race: concurrent readers would store equal tags
+        self._status_etag = (body, etag)
+        return body, etag
+
+    def get_all_device_status_if_changed(self) -> Optional[tuple[int, list[dict], bytes]]:
+        """Get (version, status, JSON) if state changed since the last broadcast, else None.
+
+        The version is checked before anything is built, so ticks with no
+        change cost a comparison. Pass the returned version to
+        mark_broadcast_complete.
+        """
+        self._refresh_online_status()
+        version = self._state_version
+        if version == self._last_broadcast_version:
+            return None
+        snapshot, body = self._encoded_status()
+        return version, list(snapshot), body
+
+    def _encoded_status(self) -> tuple[tuple[dict, ...], bytes]:
+        """The current status snapshot and its JSON encoding."""
+        snapshot = self._status_tuple()
+        cached = self._status_json
+        if cached is not None and cached[0] is snapshot:
+            return snapshot, cached[1]
+        body = orjson.dumps(snapshot)
+        self._status_json = (snapshot, body)
+        return snapshot, body
+
+    def _status_tuple(self) -> tuple[dict, ...]:
+        """The current status snapshot; only a rebuild takes the lock."""
+        snapshot = self._status_snapshot
+        if snapshot is None:
+            with self._lock.read():
+                snapshot = tuple(device.to_dict() for device in self._devices.values())
+                # Benign race: concurrent readers would store equal snapshots
+                self._status_snapshot = snapshot
+        return snapshot
+
+    def _device_changed(self, device: DeviceState) -> None:
+        """Drop cached serializations after mutating a device (call within write lock)."""
+        device.mark_dirty()
+        self._status_snapshot = None
+
+    def _is_online(self, device: DeviceState, now: float) -> bool:
+        """Whether the device's last heartbeat is within the timeout."""
+        return device.last_heartbeat_mono > 0 and now - device.last_heartbeat_mono < self._heartbeat_timeout
+
+    def _refresh_online_status(self) -> None:
+        """Apply queued updates and heartbeat timeouts to the online flags.
+
+        A flip is a versioned mutation, so it's made under the write lock; the
+        common case where nothing timed out only takes the read lock.
+        """
+        if self._pending_heartbeats or self._pending_fast_values:
+            with self._lock.write():
+                self._drain_heartbeats()
+                self._drain_fast_values()
+                now = time.monotonic()
+                for device in self._devices.values():
+                    self._update_online_status(device, now)
+            return
+        now = time.monotonic()
+        with self._lock.read():
+            if all(self._is_online(d, now) == d.online for d in self._devices.values()):
+                return
+        with self._lock.write():
             for device in self._devices.values():
-                self._update_online_status(device)
-                result.append(device.to_dict())
-            return result
-
-    def _update_online_status(self, device: DeviceState) -> None:
-        """Update the online status based on heartbeat timeout."""
-        if device.last_heartbeat > 0:
-            elapsed = time.time() - device.last_heartbeat
-            device.online = elapsed < self._heartbeat_timeout
-        else:
-            device.online = False
+                self._update_online_status(device, now)
+
+    def _drain_fast_values(self) -> None:
+        """Apply queued fast value batches, newest values per device (call within write lock)."""
+        pending = self._pending_fast_values
+        if not pending:
+            return
+        latest: dict[str, Sequence[int]] = {}
+        while pending:
+            latest.update(pending.popleft())
+        self._apply_fast_values(latest.items())
+
+    def _apply_fast_values(self, updates: Iterable[tuple[str, Sequence[int]]]) -> None:
+        """Set fast values for several devices with one version bump (call within write lock)."""
+        changed = False
+        for device_id, values in updates:
+            device = self._devices.get(device_id)
+            if device:
+                device.fast_values = _frozen_channel_bytes(values, device.channels)
+                self._device_changed(device)
+                changed = True
+        if changed:
+            self._increment_version()
+
+    def _drain_heartbeats(self) -> None:
+        """Apply queued heartbeats (call within write lock)."""
+        pending = self._pending_heartbeats
+        came_online = False
+        while pending:
+            device_id, wall, mono = pending.popleft()
+            device = self._devices.get(device_id)
+            if not device or mono < device.last_heartbeat_mono:
+                continue
+            device.last_heartbeat = wall
+            device.last_heartbeat_mono = mono
+            if not device.online:
+                device.online = True
+                came_online = True
+            self._device_changed(device)
+        # Only increment version if online status actually changed
+        if came_online:
+            self._increment_version()
+
+    def _update_online_status(self, device: DeviceState, now: float) -> None:
+        """Update the online status based on heartbeat timeout (call within write lock)."""
+        online = self._is_online(device, now)
+        if online != device.online:
+            device.online = online
+            self._device_changed(device)
+            self._increment_version()
+
+    def get_next_heartbeat_expiry(self) -> Optional[float]:
+        """Get the time.monotonic() value at which the next online device times out."""
+        # Also drains queued heartbeats, so this is called at least once per liveness tick
+        self._refresh_online_status()
+        with self._lock.read():
+            return min(
+                (d.last_heartbeat_mono + self._heartbeat_timeout for d in self._devices.values() if d.online),
+                default=None,
+            )
 
     def set_device_mode(self, device_id: str, mode: DeviceMode) -> bool:
         """Set the operating mode for a device."""
-        with self._lock:
+        with self._lock.write():
             device = self._devices.get(device_id)
             if device:
                 device.mode = mode
+                self._device_changed(device)
+                self._mode_devices = None
+                self._fast_type_devices = None
                 self._increment_version()
                 return True
             return False
 
     def get_device_mode(self, device_id: str) -> Optional[DeviceMode]:
         """Get the operating mode for a device."""
-        with self._lock:
+        with self._lock.read():
             device = self._devices.get(device_id)
             if device:
                 return device.mode
             return None
 
-    def set_static_values(self, device_id: str, values: list[int]) -> bool:
+    def set_static_values(self, device_id: str, values: Sequence[int]) -> bool:
         """Set static brightness values for a device."""
-        with self._lock:
+        with self._lock.write():
             device = self._devices.get(device_id)
             if device:
                 # Clamp values to 0-255 and pad/truncate to match channel count
-                clamped = [max(0, min(255, v)) for v in values]
-                if len(clamped) < device.channels:
-                    clamped.extend([0] * (device.channels - len(clamped)))
-                elif len(clamped) > device.channels:
-                    clamped = clamped[:device.channels]
-                device.static_values = clamped
+                device.static_values = _channel_bytes(values, device.channels)
+                self._device_changed(device)
                 self._increment_version()
                 return True
             return False
 
-    def get_static_values(self, device_id: str) -> Optional[list[int]]:
-        """Get static brightness values for a device."""
-        with self._lock:
+    def get_static_values(self, device_id: str) -> Optional[bytes]:
+        """Get an immutable snapshot of static brightness values for a device."""
+        with self._lock.read():
             device = self._devices.get(device_id)
             if device:
-                return device.static_values.copy()
+                return bytes(device.static_values)
             return None
 
-    def set_fast_values(self, device_id: str, values: list[int]) -> bool:
+    def set_fast_values(self, device_id: str, values: Sequence[int]) -> bool:
         """Set fast mode values for a device."""
-        with self._lock:
+        with self._lock.write():
             device = self._devices.get(device_id)
             if device:
                 # Clamp values to 0-255 and pad/truncate to match channel count
-                clamped = [max(0, min(255, v)) for v in values]
-                if len(clamped) < device.channels:
-                    clamped.extend([0] * (device.channels - len(clamped)))
-                elif len(clamped) > device.channels:
-                    clamped = clamped[:device.channels]
-                device.fast_values = clamped
+                device.fast_values = _frozen_channel_bytes(values, device.channels)
+                self._device_changed(device)
                 self._increment_version()
                 return True
             return False
 
-    def get_fast_values(self, device_id: str) -> Optional[list[int]]:
-        """Get fast mode values for a device."""
-        with self._lock:
+    def queue_fast_values(self, updates: Sequence[tuple[str, Sequence[int]]]) -> None:
+        """Queue fast values for several devices without taking the lock.
+
+        For the UDP repeater's hot path: the batch is applied by the next
+        reader of fast values or device status.
+        """
+        if updates:
+            self._pending_fast_values.append(updates)
+
+    def get_fast_values(self, device_id: str) -> Optional[bytes]:
+        """Get fast mode values for a device (immutable, one clamped byte per channel)."""
+        if self._pending_fast_values:
+            with self._lock.write():
+                self._drain_fast_values()
+        with self._lock.read():
             device = self._devices.get(device_id)
             if device:
-                return device.fast_values.copy()
+                return device.fast_values
             return None
 
     def update_heartbeat(self, device_id: str) -> bool:
-        """Update the last heartbeat timestamp for a device."""
-        with self._lock:
-            device = self._devices.get(device_id)
-            if device:
-                was_online = device.online
-                device.last_heartbeat = time.time()
-                device.online = True
-                # Only increment version if online status actually changed
-                if not was_online:
-                    self._increment_version()
-                return True
+        """Record a heartbeat for a device.
+
+        Heartbeats are queued without taking the lock and applied in a batch
+        by the next status read (see _drain_heartbeats).
+        """
+        if device_id not in self._devices:
             return False
+        self._pending_heartbeats.append((device_id, time.time(), time.monotonic()))
+        return True
 
     def increment_device_error(self, device_id: str) -> None:
         """Increment the error count for a device."""
-        with self._lock:
+        with self._lock.write():
             device = self._devices.get(device_id)
             if device:
                 device.error_count += 1
+                self._device_changed(device)
                 self._increment_version()
 
     def increment_device_reconnect(self, device_id: str) -> None:
         """Increment the reconnect count for a device."""
-        with self._lock:
+        with self._lock.write():
             device = self._devices.get(device_id)
             if device:
                 device.reconnect_count += 1
+                self._device_changed(device)
                 self._increment_version()
 
     def get_devices_by_mode(self, mode: DeviceMode) -> list[str]:
         """Get list of device IDs in a specific mode."""
-        with self._lock:
-            return [
-                device_id
-                for device_id, device in self._devices.items()
-                if device.mode == mode
-            ]
+        with self._lock.read():
+            mode_devices = self._mode_devices
+            if mode_devices is None:
+                grouped: dict[DeviceMode, list[str]] = {m: [] for m in DeviceMode}
+                for device_id, device in self._devices.items():
+                    grouped[device.mode].append(device_id)
+                mode_devices = {m: tuple(ids) for m, ids in grouped.items()}
+                # Benign race: concurrent readers would store equal indexes
+                self._mode_devices = mode_devices
+            return list(mode_devices[mode])
 
     def set_device_plan(self, device_id: str, plan_id: Optional[str]) -> bool:
         """Set the planned mode plan ID for a device."""
-        with self._lock:
+        with self._lock.write():
             device = self._devices.get(device_id)
             if device:
                 device.planned_plan_id = plan_id
+                self._device_changed(device)
                 self._increment_version()
                 return True
             return False
 
     def get_device_plan(self, device_id: str) -> Optional[str]:
         """Get the planned mode plan ID for a device."""
-        with self._lock:
+        with self._lock.read():
             device = self._devices.get(device_id)
             if device:
                 return device.planned_plan_id
@@ -351,49 +699,49 @@ class SharedState:
 
     def set_mqtt_connected(self, connected: bool) -> None:
         """Set MQTT connection status."""
-        with self._lock:
+        with self._lock.write():
             if self._mqtt_connected != connected:
                 self._mqtt_connected = connected
                 self._increment_version()
 
     def is_mqtt_connected(self) -> bool:
         """Check if MQTT is connected."""
-        with self._lock:
-            return self._mqtt_connected
+        return self._mqtt_connected
 
     def increment_mqtt_error(self) -> None:
         """Increment MQTT error count."""
-        with self._lock:
-            self._mqtt_error_count += 1
+        self._mqtt_error_count = next(self._mqtt_errors)
 
     def get_mqtt_error_count(self) -> int:
         """Get MQTT error count."""
-        with self._lock:
-            return self._mqtt_error_count
+        return self._mqtt_error_count
 
     # --- Room Control Methods ---
 
     def get_room_names(self) -> list[str]:
         """Get list of all room names."""
-        with self._lock:
+        with self._lock.read():
             return list(self._rooms.keys())
 
     def get_room_control_state(self, room_name: str) -> Optional[RoomControlState]:
         """Get the control state for a room."""
-        with self._lock:
+        with self._lock.read():
             return self._rooms.get(room_name)
 
     def get_all_room_control_states(self) -> dict[str, dict]:
         """Get all room control states as dictionaries."""
-        with self._lock:
+        with self._lock.read():
             return {name: room.to_dict() for name, room in self._rooms.items()}
 
     def set_room_control_mode(self, room_name: str, control_mode: RoomControlMode) -> bool:
         """Set the control mode (AUTO/MANUAL) for a room."""
-        with self._lock:
+        with self._lock.write():
             room = self._rooms.get(room_name)
             if room:
                 room.control_mode = control_mode
+                room.mark_dirty()
+                # Devices follow the room's fast mode type only in AUTO
+                self._fast_type_devices = None
                 # When switching to AUTO, apply room settings to all devices
                 if control_mode == RoomControlMode.AUTO:
                     self._apply_room_settings_to_devices(room_name)
@@ -403,7 +751,7 @@ class SharedState:
 
     def get_room_control_mode(self, room_name: str) -> Optional[RoomControlMode]:
         """Get the control mode for a room."""
-        with self._lock:
+        with self._lock.read():
             room = self._rooms.get(room_name)
             if room:
                 return room.control_mode
@@ -411,10 +759,11 @@ class SharedState:
 
     def set_room_mode(self, room_name: str, mode: DeviceMode) -> bool:
         """Set the operating mode for a room (applies to all devices in AUTO mode)."""
-        with self._lock:
+        with self._lock.write():
             room = self._rooms.get(room_name)
             if room:
                 room.mode = mode
+                room.mark_dirty()
                 if room.control_mode == RoomControlMode.AUTO:
                     self._apply_room_settings_to_devices(room_name)
                 self._increment_version()
@@ -423,12 +772,12 @@ class SharedState:
 
     def set_room_static_values(self, room_name: str, values: list[int]) -> bool:
         """Set static brightness values for a room (applies to all devices in AUTO mode)."""
-        with self._lock:
+        with self._lock.write():
             room = self._rooms.get(room_name)
             if room:
                 # Clamp values to 0-255
-                clamped = [max(0, min(255, v)) for v in values]
-                room.static_values = clamped
+                room.static_values = _channel_bytes(values)
+                room.mark_dirty()
                 if room.control_mode == RoomControlMode.AUTO:
                     self._apply_room_settings_to_devices(room_name)
                 self._increment_version()
@@ -437,10 +786,11 @@ class SharedState:
 
     def set_room_planned_plan(self, room_name: str, plan_id: Optional[str]) -> bool:
         """Set the planned mode plan ID for a room (applies to all devices in AUTO mode)."""
-        with self._lock:
+        with self._lock.write():
             room = self._rooms.get(room_name)
             if room:
                 room.planned_plan_id = plan_id
+                room.mark_dirty()
                 if room.control_mode == RoomControlMode.AUTO:
                     self._apply_room_settings_to_devices(room_name)
                 self._increment_version()
@@ -449,10 +799,11 @@ class SharedState:
 
     def set_room_fast_mode_type(self, room_name: str, fast_mode_type: FastModeType) -> bool:
         """Set the fast mode type for a room (applies to all devices in AUTO mode)."""
-        with self._lock:
+        with self._lock.write():
             room = self._rooms.get(room_name)
             if room:
                 room.fast_mode_type = fast_mode_type
+                room.mark_dirty()
                 if room.control_mode == RoomControlMode.AUTO:
                     self._apply_room_settings_to_devices(room_name)
                 self._increment_version()
@@ -465,117 +816,133 @@ class SharedState:
         if not room:
             return
         
-        for device in self._devices.values():
-            if device.room == room_name:
-                device.mode = room.mode
-                device.planned_plan_id = room.planned_plan_id
-                device.fast_mode_type = room.fast_mode_type
-                # Apply static values, adapting to device channel count
-                device_values = room.static_values[:device.channels]
-                if len(device_values) < device.channels:
-                    device_values.extend([0] * (device.channels - len(device_values)))
-                device.static_values = device_values
+        for device_id in self._room_devices.get(room_name, ()):
+            device = self._devices[device_id]
+            device.mode = room.mode
+            device.planned_plan_id = room.planned_plan_id
+            device.fast_mode_type = room.fast_mode_type
+            # Apply static values, adapting to device channel count
+            device.static_values = _channel_bytes(room.static_values, device.channels)
+            self._device_changed(device)
+        self._mode_devices = None
+        self._fast_type_devices = None
 
     def get_devices_in_room(self, room_name: str) -> list[str]:
         """Get list of device IDs in a specific room."""
-        with self._lock:
-            return [
-                device_id
-                for device_id, device in self._devices.items()
-                if device.room == room_name
-            ]
+        with self._lock.read():
+            return list(self._room_devices.get(room_name, ()))
 
     def is_room_auto_mode(self, room_name: str) -> bool:
         """Check if a room is in AUTO control mode."""
-        with self._lock:
+        with self._lock.read():
             room = self._rooms.get(room_name)
             return room is not None and room.control_mode == RoomControlMode.AUTO
 
+    def _effective_room(self, device: DeviceState) -> Optional[RoomControlState]:
+        """The device's room if it's in AUTO mode and overrides device settings (call within lock)."""
+        room = self._rooms.get(device.room)
+        if room and room.control_mode == RoomControlMode.AUTO:
+            return room
+        return None
+
+    def get_effective_state(self, device_id: str) -> Optional[EffectiveState]:
+        """Get all effective settings for a device under a single lock."""
+        with self._lock.read():
+            device = self._devices.get(device_id)
+            if not device:
+                return None
+            room = self._effective_room(device)
+            if room:
+                # Adapt room values to device channel count
+                source = room
+                static_values = bytes(_channel_bytes(room.static_values, device.channels))
+            else:
+                source = device
+                static_values = bytes(device.static_values)
+            return EffectiveState(
+                mode=source.mode,
+                static_values=static_values,
+                planned_plan_id=source.planned_plan_id,
+                fast_mode_type=source.fast_mode_type,
+                channels=device.channels,
+                ip=device.ip,
+                udp_port=device.udp_port,
+            )
+
     def get_effective_mode(self, device_id: str) -> Optional[DeviceMode]:
         """Get the effective operating mode for a device (considers room AUTO mode)."""
-        with self._lock:
+        with self._lock.read():
             device = self._devices.get(device_id)
             if not device:
                 return None
-            room = self._rooms.get(device.room)
-            if room and room.control_mode == RoomControlMode.AUTO:
-                return room.mode
-            return device.mode
+            return (self._effective_room(device) or device).mode
 
-    def get_effective_static_values(self, device_id: str) -> Optional[list[int]]:
+    def get_effective_static_values(self, device_id: str) -> Optional[tuple[int, ...]]:
         """Get the effective static values for a device (considers room AUTO mode)."""
-        with self._lock:
+        with self._lock.read():
             device = self._devices.get(device_id)
             if not device:
                 return None
-            room = self._rooms.get(device.room)
-            if room and room.control_mode == RoomControlMode.AUTO:
+            room = self._effective_room(device)
+            if room:
                 # Adapt room values to device channel count
-                values = room.static_values[:device.channels]
-                if len(values) < device.channels:
-                    values = values + [0] * (device.channels - len(values))
-                return values
-            return device.static_values.copy()
+                return tuple(_channel_bytes(room.static_values, device.channels))
+            return tuple(device.static_values)
 
     def get_effective_planned_plan(self, device_id: str) -> Optional[str]:
         """Get the effective planned plan ID for a device (considers room AUTO mode)."""
-        with self._lock:
+        with self._lock.read():
             device = self._devices.get(device_id)
             if not device:
                 return None
-            room = self._rooms.get(device.room)
-            if room and room.control_mode == RoomControlMode.AUTO:
-                return room.planned_plan_id
-            return device.planned_plan_id
+            return (self._effective_room(device) or device).planned_plan_id
 
     def get_effective_fast_mode_type(self, device_id: str) -> Optional[FastModeType]:
         """Get the effective fast mode type for a device (considers room AUTO mode)."""
-        with self._lock:
+        with self._lock.read():
             device = self._devices.get(device_id)
             if not device:
                 return None
-            room = self._rooms.get(device.room)
-            if room and room.control_mode == RoomControlMode.AUTO:
-                return room.fast_mode_type
-            return device.fast_mode_type
+            return (self._effective_room(device) or device).fast_mode_type
 
     def set_device_fast_mode_type(self, device_id: str, fast_mode_type: FastModeType) -> bool:
         """Set the fast mode type for a device."""
-        with self._lock:
+        with self._lock.write():
             device = self._devices.get(device_id)
             if device:
                 device.fast_mode_type = fast_mode_type
+                self._device_changed(device)
+                self._fast_type_devices = None
                 self._increment_version()
                 return True
             return False
 
-    def get_devices_by_fast_mode_type(self, fast_mode_type: FastModeType) -> list[str]:
-        """Get list of device IDs with a specific fast mode type that are in fast mode."""
-        with self._lock:
-            result = []
-            for device_id, device in self._devices.items():
-                if device.mode != DeviceMode.FAST:
-                    continue
-                # Check effective fast mode type (considers room AUTO)
-                room = self._rooms.get(device.room)
-                effective_type = (
-                    room.fast_mode_type
-                    if room and room.control_mode == RoomControlMode.AUTO
-                    else device.fast_mode_type
-                )
-                if effective_type == fast_mode_type:
-                    result.append(device_id)
-            return result
+    def get_devices_by_fast_mode_type(self, fast_mode_type: FastModeType) -> tuple[str, ...]:
+        """Get IDs of devices in fast mode with a specific fast mode type.
+
+        Called per received UDP frame, so the cached index is read without the
+        lock; it is replaced wholesale (never mutated) by writers.
+        """
+        fast_type_devices = self._fast_type_devices
+        if fast_type_devices is None:
+            with self._lock.read():
+                grouped: dict[FastModeType, list[str]] = {t: [] for t in FastModeType}
+                for device_id, device in self._devices.items():
+                    if device.mode != DeviceMode.FAST:
+                        continue
+                    # Check effective fast mode type (considers room AUTO)
+                    grouped[(self._effective_room(device) or device).fast_mode_type].append(device_id)
+                fast_type_devices = {t: tuple(ids) for t, ids in grouped.items()}
+                # Benign race: concurrent readers would store equal indexes
+                self._fast_type_devices = fast_type_devices
+        return fast_type_devices[fast_mode_type]
 
 
-# Global state instance
-_state: Optional[SharedState] = None
+# Global state instance, created at import so threads can't race to build two
+_state = SharedState()
 
 
 def get_state() -> SharedState:
     """Get the global shared state instance."""
-    global _state
-    if _state is None:
-        _state = SharedState()
     return _state
 
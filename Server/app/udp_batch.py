@@ -0,0 +1,199 @@
+"""Batched UDP sends and receives via Linux sendmmsg(2)/recvmmsg(2).
+
+Sending one datagram per device costs one syscall each; sendmmsg hands the
+kernel the whole batch at once. Only IPv4 literal addresses are batched and
+the helper reports how many messages went out, so callers send whatever is
+left with plain sendto (which is also the path on non-Linux platforms).
+recvmmsg likewise pulls every queued datagram in one call.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import socket
+import struct
+import sys
+from typing import Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class _Iovec(ctypes.Structure):
+    _fields_ = [
+        ("iov_base", ctypes.c_void_p),
+        ("iov_len", ctypes.c_size_t),
+    ]
+
+
+class _Msghdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_Iovec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _Mmsghdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_hdr", _Msghdr),
+        ("msg_len", ctypes.c_uint),
+    ]
+
+
+def _load_libc_func(name: str, argtypes: list):
+    """Look up a libc function, or None where it isn't available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        func = getattr(libc, name)
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = argtypes
+    func.restype = ctypes.c_int
+    return func
+
+
+_sendmmsg = _load_libc_func(
+    "sendmmsg", [ctypes.c_int, ctypes.POINTER(_Mmsghdr), ctypes.c_uint, ctypes.c_int]
+)
+_recvmmsg = _load_libc_func(
+    "recvmmsg", [ctypes.c_int, ctypes.POINTER(_Mmsghdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+)
+
+# Room for any address family (sizeof(struct sockaddr_storage))
+_SOCKADDR_STORAGE_SIZE = 128
+
+# sockaddr_in: family (native order), port (network order), IPv4 address, padding
+_SOCKADDR_IN = struct.Struct("=H")
+_SOCKADDR_IN_PORT = struct.Struct(">H")
+
+
+class BatchSender:
+    """Sends a batch of datagrams on one socket with a single sendmmsg call."""
+
+    def __init__(self):
+        # (ip, port) -> packed sockaddr_in, or None for addresses we can't batch
+        self._addresses: dict[tuple[str, int], Optional[ctypes.Array]] = {}
+
+    def _sockaddr(self, addr: tuple[str, int]) -> Optional[ctypes.Array]:
+        """Packed sockaddr_in for an address, built once per address."""
+        try:
+            return self._addresses[addr]
+        except KeyError:
+            pass
+        ip, port = addr
+        try:
+            packed = (
+                _SOCKADDR_IN.pack(socket.AF_INET)
+                + _SOCKADDR_IN_PORT.pack(port)
+                + socket.inet_aton(ip)
+                + bytes(8)
+            )
+            sockaddr = ctypes.create_string_buffer(packed, len(packed))
+        except (OSError, struct.error):
+            # Hostnames and out-of-range ports go through sendto instead
+            sockaddr = None
+        self._addresses[addr] = sockaddr
+        return sockaddr
+
+    def send(self, sock: socket.socket, messages: Sequence[tuple[bytearray, tuple[str, int]]]) -> int:
+        """Send messages in order with one syscall.
+
+        Returns how many leading messages were sent; the caller sends the
+        rest individually (this is 0 when batching isn't available).
+        """
+        if _sendmmsg is None or not messages:
+            return 0
+
+        count = len(messages)
+        msgvec = (_Mmsghdr * count)()
+        iovecs = (_Iovec * count)()
+        # Keep the buffer views alive until the syscall returns
+        views = []
+        for i, (packet, addr) in enumerate(messages):
+            sockaddr = self._sockaddr(addr)
+            if sockaddr is None:
+                count = i
+                break
+            view = (ctypes.c_char * len(packet)).from_buffer(packet)
+            views.append(view)
+            iovecs[i].iov_base = ctypes.addressof(view)
+            iovecs[i].iov_len = len(packet)
+            hdr = msgvec[i].msg_hdr
+            hdr.msg_name = ctypes.addressof(sockaddr)
+            hdr.msg_namelen = len(sockaddr)
+            hdr.msg_iov = ctypes.pointer(iovecs[i])
+            hdr.msg_iovlen = 1
+
+        if not count:
+            return 0
+        sent = _sendmmsg(sock.fileno(), msgvec, count, 0)
+        del views
+        if sent < 0:
+            # The caller's sendto retry surfaces the error for the failing device
+            logger.debug(f"sendmmsg failed: {ctypes.get_errno()}")
+            return 0
+        return sent
+
+
+class BatchReceiver:
+    """Receives every datagram queued on a socket with a single recvmmsg call.
+
+    The message headers and buffers are allocated once and reused, so a
+    receive only copies out the datagrams that arrived.
+    """
+
+    def __init__(self, count: int, size: int):
+        self._count = count
+        self._size = size
+        self._buffers = [ctypes.create_string_buffer(size) for _ in range(count)]
+        self._names = [ctypes.create_string_buffer(_SOCKADDR_STORAGE_SIZE) for _ in range(count)]
+        self._iovecs = (_Iovec * count)()
+        self._msgvec = (_Mmsghdr * count)()
+        for i in range(count):
+            self._iovecs[i].iov_base = ctypes.addressof(self._buffers[i])
+            self._iovecs[i].iov_len = size
+            hdr = self._msgvec[i].msg_hdr
+            hdr.msg_name = ctypes.addressof(self._names[i])
+            hdr.msg_iov = ctypes.pointer(self._iovecs[i])
+            hdr.msg_iovlen = 1
+
+    def receive(self, sock: socket.socket) -> Optional[list[tuple[bytes, tuple[str, int]]]]:
+        """Return the queued (data, addr) datagrams, oldest first, without blocking.
+
+        Returns None when batching isn't available, so the caller can fall
+        back to recvfrom.
+        """
+        if _recvmmsg is None:
+            return None
+        for i in range(self._count):
+            # msg_namelen is value-result, so reset it before every call
+            self._msgvec[i].msg_hdr.msg_namelen = _SOCKADDR_STORAGE_SIZE
+
+        received = _recvmmsg(sock.fileno(), self._msgvec, self._count, socket.MSG_DONTWAIT, None)
+        if received < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return []
+            raise OSError(err, os.strerror(err))
+
+        messages = []
+        for i in range(received):
+            length = self._msgvec[i].msg_len
+            data = ctypes.string_at(self._buffers[i], length)
+            messages.append((data, self._address(i)))
+        return messages
+
+    def _address(self, index: int) -> tuple[str, int]:
+        """Decode the sender address of a received message."""
+        name = self._names[index].raw
+        if _SOCKADDR_IN.unpack_from(name)[0] == socket.AF_INET:
+            return socket.inet_ntoa(name[4:8]), _SOCKADDR_IN_PORT.unpack_from(name, 2)[0]
+        return "", 0
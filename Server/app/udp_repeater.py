@@ -7,14 +7,20 @@ Supports both LED v1 (single stream) and LED v2 (multi-stream) protocols.
 """
 
 import logging
+import selectors
 import socket
 import struct
+import sys
 import threading
 from enum import IntEnum
-from typing import Optional
+from functools import lru_cache
+from typing import NamedTuple, Optional
 
 from app.config import AppConfig
 from app.state import SharedState, DeviceMode, FastModeType
+from app.udp_batch import BatchReceiver
+from app.udp_send_pool import UdpSendPool, set_socket_option
+from app.udp_streamer import PacketBuffers
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +32,16 @@ PACKET_VERSION_2 = 2
 # For backward compatibility
 PACKET_VERSION = PACKET_VERSION_1
 
+# Most datagrams read per wakeup; only the newest of them is forwarded
+MAX_QUEUED_FRAMES = 64
+RECEIVE_BUFFER_SIZE = 1024
+
+# Not exported by the socket module on all versions; the value is fixed on Linux
+_SO_BUSY_POLL = getattr(socket, "SO_BUSY_POLL", 46 if sys.platform.startswith("linux") else None)
+
+# Precompiled packet header
+_V2_STREAM_HEADER = struct.Struct(">BB")  # stream ID, channel count
+
 
 class StreamID(IntEnum):
     """Stream identifiers for LED v2 protocol."""
@@ -34,6 +50,34 @@ class StreamID(IntEnum):
     RGB_V1 = 3   # rgb_v1: Red, Green, Blue
 
 
+class _V2Layout(NamedTuple):
+    """A v2 packet's stream layout compiled into one Struct."""
+    length: int  # Total packet length
+    stream_count: int
+    stream_ids: tuple[int, ...]  # Raw stream IDs in packet order
+    channel_counts: tuple[int, ...]
+    struct: struct.Struct  # ">BB{n}s" per stream, starting after the stream count
+    known: tuple[tuple[StreamID, int], ...]  # (stream ID, index of its values in the unpacked fields)
+
+
+@lru_cache(maxsize=16)
+def _compile_v2_layout(headers: tuple[tuple[int, int], ...]) -> _V2Layout:
+    """Compile the (stream ID, channel count) headers of a v2 packet."""
+    layout_struct = struct.Struct(">" + "".join(f"BB{n}s" for _, n in headers))
+    known = []
+    for i, (stream_id_raw, _) in enumerate(headers):
+        if stream_id_raw in StreamID._value2member_map_:
+            known.append((StreamID(stream_id_raw), 3 * i + 2))
+    return _V2Layout(
+        length=5 + layout_struct.size,
+        stream_count=len(headers),
+        stream_ids=tuple(stream_id_raw for stream_id_raw, _ in headers),
+        channel_counts=tuple(n for _, n in headers),
+        struct=layout_struct,
+        known=tuple(known),
+    )
+
+
 # Mapping from hw_mode string to StreamID
 HW_MODE_TO_STREAM_ID = {
     "4ch_v1": StreamID.CH4_V1,
@@ -74,16 +118,26 @@ class UdpRepeater:
     5. Adapts channel count for each target device (e.g., 4ch->2ch mapping)
     """
 
-    def __init__(self, config: AppConfig, state: SharedState):
+    def __init__(self, config: AppConfig, state: SharedState, send_pool: Optional[UdpSendPool] = None):
         self._config = config
         self._state = state
         self._running = False
         self._thread: Optional[threading.Thread] = None
         self._socket: Optional[socket.socket] = None
-        self._send_socket: Optional[socket.socket] = None
+        # Send sockets may be shared with the streamer
+        self._send_pool = send_pool or UdpSendPool(config)
+        self._selector: Optional[selectors.BaseSelector] = None
+        # Socket pair written by stop() to wake the receive loop immediately
+        self._wake_r: Optional[socket.socket] = None
+        self._wake_w: Optional[socket.socket] = None
         
         # Cache for last received v2 streams (for devices to pick from)
-        self._last_streams: dict[StreamID, list[int]] = {}
+        self._last_streams: dict[StreamID, bytes] = {}
+        # Layout of the last fully parsed v2 packet
+        self._v2_layout: Optional[_V2Layout] = None
+        # One packet buffer per (hw_mode, channels) group, shared by its devices
+        self._packets = PacketBuffers()
+        self._receiver = BatchReceiver(MAX_QUEUED_FRAMES, RECEIVE_BUFFER_SIZE)
 
     def start(self) -> None:
         """Start the UDP repeater in a background thread."""
@@ -98,18 +152,30 @@ class UdpRepeater:
         try:
             self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            # A deeper queue rides out bursts from the frame source
+            set_socket_option(
+                self._socket, socket.SOL_SOCKET, socket.SO_RCVBUF,
+                self._config.udp_repeater.receive_buffer_bytes,
+            )
+            set_socket_option(
+                self._socket, socket.SOL_SOCKET, _SO_BUSY_POLL,
+                self._config.udp_repeater.busy_poll_usec,
+            )
             self._socket.bind((
                 self._config.udp_repeater.listen_host,
                 self._config.udp_repeater.listen_port
             ))
-            self._socket.settimeout(1.0)  # Allow periodic check for shutdown
+            # Non-blocking so queued frames can be drained; the selector waits
+            self._socket.setblocking(False)
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._socket, selectors.EVENT_READ)
+            self._selector.register(self._wake_r, selectors.EVENT_READ)
         except Exception as e:
             logger.error(f"Failed to bind UDP repeater socket: {e}")
             return
 
-        # Create send socket
-        self._send_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self._send_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self._send_pool.open()
 
         self._running = True
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
@@ -123,24 +189,34 @@ class UdpRepeater:
     def stop(self) -> None:
         """Stop the UDP repeater."""
         self._running = False
-        
-        if self._socket:
-            try:
-                self._socket.close()
-            except Exception:
-                pass
-            self._socket = None
-            
-        if self._send_socket:
+
+        if self._wake_w:
             try:
-                self._send_socket.close()
-            except Exception:
+                self._wake_w.send(b"\0")
+            except OSError:
                 pass
-            self._send_socket = None
-            
+
+        started = self._thread is not None
         if self._thread:
             self._thread.join(timeout=5)
             self._thread = None
+
+        if self._selector:
+            self._selector.close()
+            self._selector = None
+
+        if started:
+            self._send_pool.close()
+
+        for sock in (self._socket, self._wake_r, self._wake_w):
+            if sock:
+                try:
+                    sock.close()
+                except Exception:
+                    pass
+        self._socket = None
+        self._wake_r = None
+        self._wake_w = None
             
         logger.info("UDP repeater stopped")
 
@@ -148,14 +224,37 @@ class UdpRepeater:
         """Main receive loop."""
         while self._running:
             try:
-                data, addr = self._socket.recvfrom(1024)
-                self._handle_packet(data, addr)
-            except socket.timeout:
-                continue
+                # Blocks until a frame arrives or stop() writes to the wake socket
+                events = self._selector.select()
+                if any(key.fileobj is self._wake_r for key, _ in events):
+                    break
+                newest = self._receive_newest()
+                if newest:
+                    self._handle_packet(*newest)
             except Exception as e:
                 if self._running:
                     logger.error(f"UDP repeater receive error: {e}")
 
+    def _receive_newest(self) -> Optional[tuple[bytes, tuple]]:
+        """Read the datagrams queued on the socket and return the newest.
+
+        Frames carry absolute values, so when the source outpaces the
+        forwarding loop only the latest one is worth sending; older ones
+        would just add latency.
+        """
+        # One recvmmsg call where supported
+        messages = self._receiver.receive(self._socket)
+        if messages is not None:
+            return messages[-1] if messages else None
+
+        newest = None
+        for _ in range(MAX_QUEUED_FRAMES):
+            try:
+                newest = self._socket.recvfrom(RECEIVE_BUFFER_SIZE)
+            except BlockingIOError:
+                break
+        return newest
+
     def _handle_packet(self, data: bytes, addr: tuple) -> None:
         """Handle an incoming UDP packet (v1 or v2)."""
         # Validate minimum packet size (header + version + count/channels + at least 1 value)
@@ -187,33 +286,60 @@ class UdpRepeater:
             logger.debug(f"Packet truncated from {addr}: expected {expected_len}, got {len(data)}")
             return
 
-        values = list(data[5:5 + num_channels])
+        values = data[5:5 + num_channels]
         
         # Forward to target devices using legacy single-stream logic
         self._forward_to_devices_v1(values)
     
     def _handle_v2_packet(self, data: bytes, addr: tuple) -> None:
         """Handle a LED v2 multi-stream packet."""
+        # Sources usually repeat one layout, which parses in a single unpack
+        streams = self._parse_v2_same_layout(data)
+        if streams is None:
+            streams = self._parse_v2(data, addr)
+        
+        if not streams:
+            return
+        
+        # Cache streams for device forwarding
+        self._last_streams = streams
+        
+        # Forward to target devices with stream selection
+        self._forward_to_devices_v2(streams)
+
+    def _parse_v2_same_layout(self, data: bytes) -> Optional[dict[StreamID, bytes]]:
+        """Parse a v2 packet laid out like the previous one, else return None."""
+        layout = self._v2_layout
+        if layout is None or len(data) != layout.length or data[4] != layout.stream_count:
+            return None
+        fields = layout.struct.unpack_from(data, 5)
+        if fields[0::3] != layout.stream_ids or fields[1::3] != layout.channel_counts:
+            return None
+        return {stream_id: fields[index] for stream_id, index in layout.known}
+
+    def _parse_v2(self, data: bytes, addr: tuple) -> Optional[dict[StreamID, bytes]]:
+        """Parse a v2 packet stream by stream and remember its layout."""
         stream_count = data[4]
         offset = 5
         
-        streams: dict[StreamID, list[int]] = {}
+        streams: dict[StreamID, bytes] = {}
+        headers = []
         
         for _ in range(stream_count):
             if offset + 2 > len(data):
                 logger.debug(f"V2 packet truncated at stream header from {addr}")
-                return
+                return None
             
-            stream_id_raw = data[offset]
-            num_channels = data[offset + 1]
-            offset += 2
+            stream_id_raw, num_channels = _V2_STREAM_HEADER.unpack_from(data, offset)
+            offset += _V2_STREAM_HEADER.size
             
             if offset + num_channels > len(data):
                 logger.debug(f"V2 packet truncated at stream values from {addr}")
-                return
+                return None
             
-            values = list(data[offset:offset + num_channels])
+            values = data[offset:offset + num_channels]
             offset += num_channels
+            headers.append((stream_id_raw, num_channels))
             
             try:
                 stream_id = StreamID(stream_id_raw)
@@ -222,16 +348,11 @@ class UdpRepeater:
                 # Unknown stream ID, skip but continue parsing
                 logger.debug(f"Unknown stream ID {stream_id_raw} from {addr}")
         
-        if not streams:
-            return
-        
-        # Cache streams for device forwarding
-        self._last_streams = streams
-        
-        # Forward to target devices with stream selection
-        self._forward_to_devices_v2(streams)
+        if offset == len(data):
+            self._v2_layout = _compile_v2_layout(tuple(headers))
+        return streams
 
-    def _forward_to_devices_v1(self, values: list[int]) -> None:
+    def _forward_to_devices_v1(self, values: bytes) -> None:
         """Forward v1 single-stream values to all devices (legacy behavior)."""
         # Get devices in FAST mode with udp_repeater type
         target_device_ids = self._state.get_devices_by_fast_mode_type(FastModeType.UDP_REPEATER)
@@ -239,79 +360,100 @@ class UdpRepeater:
         if not target_device_ids:
             return
 
+        messages = []
+        # Devices with the same hw_mode and channel count get the same packet
+        adapted: dict[tuple[str, int], tuple[bytes, bytearray]] = {}
         for device_id in target_device_ids:
             try:
-                self._send_to_device_v1(device_id, values)
+                message = self._device_message_v1(device_id, values, adapted)
             except Exception as e:
                 logger.debug(f"Failed to forward to {device_id}: {e}")
+                continue
+            if message:
+                messages.append(message)
+
+        self._send_messages(messages)
     
-    def _forward_to_devices_v2(self, streams: dict[StreamID, list[int]]) -> None:
+    def _forward_to_devices_v2(self, streams: dict[StreamID, bytes]) -> None:
         """Forward v2 multi-stream values, selecting best stream per device."""
         target_device_ids = self._state.get_devices_by_fast_mode_type(FastModeType.UDP_REPEATER)
         
         if not target_device_ids:
             return
 
+        messages = []
+        # Devices with the same hw_mode and channel count get the same packet
+        selected: dict[tuple[str, int], tuple[bytes, bytearray]] = {}
         for device_id in target_device_ids:
             try:
-                self._send_to_device_v2(device_id, streams)
+                message = self._device_message_v2(device_id, streams, selected)
             except Exception as e:
                 logger.debug(f"Failed to forward to {device_id}: {e}")
+                continue
+            if message:
+                messages.append(message)
+
+        self._send_messages(messages)
+
+    def _send_messages(self, messages: list[tuple[str, bytes, bytearray, tuple[str, int]]]) -> None:
+        """Send a frame's (device_id, values, packet, addr) messages and record the values."""
+        failures = self._send_pool.send_batch(
+            [(device_id, packet, addr) for device_id, _, packet, addr in messages]
+        )
+        for device_id, _, e in failures:
+            logger.debug(f"Failed to forward to {device_id}: {e}")
 
-    def _send_to_device_v1(self, device_id: str, input_values: list[int]) -> None:
-        """Send v1 values to a specific device, adapting channel count."""
+        # Queue the state update (for UI display); readers apply it off this thread
+        self._state.queue_fast_values([(device_id, values) for device_id, values, _, _ in messages])
+
+    def _device_message_v1(
+        self, device_id: str, input_values: bytes, adapted: dict[tuple[str, int], tuple[bytes, bytearray]]
+    ) -> Optional[tuple[str, bytes, bytearray, tuple[str, int]]]:
+        """Build a device's v1 message, adapting channel count.
+
+        adapted memoizes (values, packet) per (hw_mode, channels) within a frame.
+        Returns (device_id, values, packet, addr), or None if the device is unknown.
+        """
         device_config = self._config.get_device_by_id(device_id)
         if not device_config:
-            return
-
-        device_state = self._state.get_device_state(device_id)
-        if not device_state:
-            return
+            return None
 
         # Adapt values to device channel count
-        device_channels = device_config.channels
-        adapted_values = self._adapt_channels(input_values, device_channels, device_config.hw_mode)
-        
-        # Update state (for UI display)
-        self._state.set_fast_values(device_id, adapted_values)
+        key = (device_config.hw_mode, device_config.channels)
+        frame = adapted.get(key)
+        if frame is None:
+            adapted_values = self._adapt_channels(input_values, key[1], key[0])
+            frame = adapted[key] = (adapted_values, self._packets.fill(key, adapted_values))
 
-        # Build and send packet
-        packet = self._build_packet(adapted_values)
-        
-        if self._send_socket:
-            self._send_socket.sendto(packet, (device_config.ip, device_config.udp_port))
+        return device_id, frame[0], frame[1], device_config.udp_addr
     
-    def _send_to_device_v2(self, device_id: str, streams: dict[StreamID, list[int]]) -> None:
-        """Send v2 values to a device, selecting best matching stream."""
+    def _device_message_v2(
+        self, device_id: str, streams: dict[StreamID, bytes], selected: dict[tuple[str, int], tuple[bytes, bytearray]]
+    ) -> Optional[tuple[str, bytes, bytearray, tuple[str, int]]]:
+        """Build a device's v2 message, selecting best matching stream.
+
+        selected memoizes (values, packet) per (hw_mode, channels) within a frame.
+        Returns (device_id, values, packet, addr), or None if the device is unknown.
+        """
         device_config = self._config.get_device_by_id(device_id)
         if not device_config:
-            return
+            return None
 
-        device_state = self._state.get_device_state(device_id)
-        if not device_state:
-            return
-
-        hw_mode = device_config.hw_mode
-        device_channels = device_config.channels
-        
         # Select best stream for this device
-        values = self._select_stream_for_device(streams, hw_mode, device_channels)
-        
-        # Update state (for UI display)
-        self._state.set_fast_values(device_id, values)
+        key = (device_config.hw_mode, device_config.channels)
+        frame = selected.get(key)
+        if frame is None:
+            values = self._select_stream_for_device(streams, key[0], key[1])
+            frame = selected[key] = (values, self._packets.fill(key, values))
 
-        # Build and send packet
-        packet = self._build_packet(values)
-        
-        if self._send_socket:
-            self._send_socket.sendto(packet, (device_config.ip, device_config.udp_port))
+        return device_id, frame[0], frame[1], device_config.udp_addr
     
     def _select_stream_for_device(
         self, 
-        streams: dict[StreamID, list[int]], 
+        streams: dict[StreamID, bytes], 
         hw_mode: str,
         device_channels: int
-    ) -> list[int]:
+    ) -> bytes:
         """
         Select the best stream for a device based on its hw_mode.
         
@@ -340,9 +482,9 @@ class UdpRepeater:
             return self._adapt_channels(first_values, device_channels, hw_mode)
         
         # No streams available
-        return [0] * device_channels
+        return bytes(device_channels)
 
-    def _adapt_channels(self, input_values: list[int], target_channels: int, hw_mode: str) -> list[int]:
+    def _adapt_channels(self, input_values: bytes, target_channels: int, hw_mode: str) -> bytes:
         """
         Adapt input values to the target device's channel count.
         
@@ -362,23 +504,10 @@ class UdpRepeater:
             yellow = input_values[1]
             blue = input_values[2]
             red = input_values[3]
-            return [max(red, yellow), max(green, blue)]
+            return bytes((max(red, yellow), max(green, blue)))
         
         # Generic adaptation: truncate or pad
         if input_len >= target_channels:
             return input_values[:target_channels]
         else:
-            return input_values + [0] * (target_channels - input_len)
-
-    def _build_packet(self, values: list[int]) -> bytes:
-        """Build a LED v1 packet for sending to a device."""
-        num_channels = len(values)
-        clamped_values = [max(0, min(255, v)) for v in values]
-        
-        packet = bytearray()
-        packet.extend(PACKET_HEADER)
-        packet.append(PACKET_VERSION)
-        packet.append(num_channels)
-        packet.extend(clamped_values)
-        
-        return bytes(packet)
+            return input_values + bytes(target_channels - input_len)
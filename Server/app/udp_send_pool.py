@@ -0,0 +1,156 @@
+"""UDP send sockets shared by the streamer and the repeater."""
+
+import logging
+import socket
+import threading
+from typing import Optional, Sequence
+
+from app.config import AppConfig
+from app.udp_batch import BatchSender
+
+logger = logging.getLogger(__name__)
+
+
+def set_socket_option(sock: socket.socket, level: int, option: Optional[int], value: int) -> None:
+    """Best-effort setsockopt; tuning failures are logged, not fatal."""
+    if option is None or value <= 0:
+        return
+    try:
+        sock.setsockopt(level, option, value)
+    except OSError as e:
+        logger.warning(f"Could not set socket option {option}={value}: {e}")
+
+
+class DeviceSockets:
+    """Per-device UDP sockets connected to each device's address.
+
+    send() on a connected socket skips the per-packet destination handling
+    of sendto(), and a hostname is resolved once at connect time rather than
+    on every packet. A socket is reconnected when the device's address
+    changes. Lookups are lock-free; creating a socket takes a lock so two
+    sending threads don't connect the same device twice.
+    """
+
+    def __init__(self, send_buffer_bytes: int):
+        self._send_buffer_bytes = send_buffer_bytes
+        self._sockets: dict[str, tuple[tuple[str, int], socket.socket]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, device_id: str, addr: tuple[str, int]) -> socket.socket:
+        """Socket connected to addr for the device, created on first use."""
+        entry = self._sockets.get(device_id)
+        if entry is not None and entry[0] == addr:
+            return entry[1]
+
+        with self._lock:
+            entry = self._sockets.get(device_id)
+            if entry is not None:
+                if entry[0] == addr:
+                    return entry[1]
+                entry[1].close()
+                del self._sockets[device_id]
+
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                set_socket_option(sock, socket.SOL_SOCKET, socket.SO_SNDBUF, self._send_buffer_bytes)
+                sock.connect(addr)
+            except Exception:
+                sock.close()
+                raise
+            self._sockets[device_id] = (addr, sock)
+            return sock
+
+    def close(self) -> None:
+        """Close every device socket."""
+        with self._lock:
+            for _, sock in self._sockets.values():
+                try:
+                    sock.close()
+                except Exception:
+                    pass
+            self._sockets.clear()
+
+
+class UdpSendPool:
+    """
+    Send sockets shared by every UDP sender.
+
+    Holds one unconnected socket for batched (sendmmsg) and one-off sends,
+    plus a connected socket per device for what a batch doesn't cover, so
+    the streamer and the repeater don't each open a socket per device.
+    Sends are atomic per datagram, so both threads can use the sockets at
+    once; packet buffers stay with each sender.
+
+    Users call open() when they start and close() when they stop; the
+    sockets are closed once the last user is gone.
+    """
+
+    def __init__(self, config: AppConfig):
+        self._config = config
+        self._users = 0
+        self._lock = threading.Lock()
+        self._socket: Optional[socket.socket] = None
+        self._device_sockets: Optional[DeviceSockets] = None
+        self._batch_sender = BatchSender()
+
+    @property
+    def socket(self) -> Optional[socket.socket]:
+        """The unconnected send socket, or None while the pool is closed."""
+        return self._socket
+
+    def open(self) -> None:
+        """Register a user, creating the sockets for the first one."""
+        with self._lock:
+            self._users += 1
+            if self._socket:
+                return
+            send_buffer_bytes = self._config.udp.send_buffer_bytes
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            set_socket_option(sock, socket.SOL_SOCKET, socket.SO_SNDBUF, send_buffer_bytes)
+            self._device_sockets = DeviceSockets(send_buffer_bytes)
+            self._socket = sock
+
+    def close(self) -> None:
+        """Unregister a user, closing the sockets after the last one."""
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users:
+                return
+            if self._device_sockets:
+                self._device_sockets.close()
+                self._device_sockets = None
+            if self._socket:
+                try:
+                    self._socket.close()
+                except Exception:
+                    pass
+                self._socket = None
+
+    def send_batch(
+        self, messages: Sequence[tuple[str, bytearray, tuple[str, int]]]
+    ) -> list[tuple[str, tuple[str, int], Exception]]:
+        """
+        Send (device_id, packet, addr) messages.
+
+        One sendmmsg covers the batch where supported; anything it didn't
+        send goes out one by one on each device's connected socket, so
+        errors are attributed per device.
+
+        Returns:
+            (device_id, addr, error) for each message that failed
+        """
+        sock = self._socket
+        device_sockets = self._device_sockets
+        if not sock or not device_sockets:
+            return []
+
+        sent = self._batch_sender.send(sock, [(packet, addr) for _, packet, addr in messages])
+        failures = []
+        for device_id, packet, addr in messages[sent:]:
+            try:
+                device_sockets.get(device_id, addr).send(packet)
+            except Exception as e:
+                failures.append((device_id, addr, e))
+        return failures
@@ -5,10 +5,12 @@ import socket
 import struct
 import threading
 import time
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Hashable, Optional, Sequence
 
 from app.config import AppConfig
 from app.state import SharedState, DeviceMode
+from app.udp_send_pool import UdpSendPool
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +19,67 @@ logger = logging.getLogger(__name__)
 PACKET_HEADER = b"LED"  # 3 bytes header
 PACKET_VERSION = 1  # Protocol version
 
+# Precompiled packet headers
+_V1_HEADER = struct.Struct(">3sBB")  # "LED", version, channel count
+_DDP_HEADER = struct.Struct(">BBBBIH")  # flags, sequence, type, dest, offset, length
+
+
+def clamp_bytes(values: Sequence[int]) -> bytes:
+    """Pack values into bytes, clamping each to 0-255.
+
+    Values are normally in range already, so the C-level bytes() conversion
+    is tried first and the per-value clamp only runs when it rejects one.
+    """
+    try:
+        return bytes(values)
+    except ValueError:
+        return bytes([max(0, min(255, v)) for v in values])
+
+
+@lru_cache(maxsize=32)
+def v1_packet_builder(num_channels: int) -> Callable[[bytes], bytes]:
+    """Return a function packing a whole LED v1 packet for num_channels values.
+
+    Channel counts rarely change, so each gets one compiled Struct covering
+    header and values, and a packet is a single pack call.
+    """
+    pack = struct.Struct(f">3sBB{num_channels}s").pack
+
+    def build(payload: bytes) -> bytes:
+        return pack(PACKET_HEADER, PACKET_VERSION, num_channels, payload)
+
+    return build
+
+
+@lru_cache(maxsize=64)
+def _ddp_header(flags: int, offset: int, length: int) -> bytes:
+    """Packed DDP header; streams repeat the same flags, offset and length."""
+    # Sequence 0 (unused), data type 0x01 (RGB), destination 0x01 (default device)
+    return _DDP_HEADER.pack(flags, 0, 0x01, 0x01, offset, length)
+
+
+class PacketBuffers:
+    """Reusable LED v1 packet buffers, keyed per device (or per device group).
+
+    Each key keeps a bytearray with the header already packed, so a send
+    only overwrites the values. A buffer is rebuilt when the channel count
+    changes.
+    """
+
+    def __init__(self):
+        self._buffers: dict[Hashable, bytearray] = {}
+
+    def fill(self, key: Hashable, values: Sequence[int]) -> bytearray:
+        """Write values into the key's packet buffer and return it."""
+        size = _V1_HEADER.size + len(values)
+        buf = self._buffers.get(key)
+        if buf is None or len(buf) != size:
+            buf = bytearray(size)
+            _V1_HEADER.pack_into(buf, 0, PACKET_HEADER, PACKET_VERSION, len(values))
+            self._buffers[key] = buf
+        buf[_V1_HEADER.size:] = clamp_bytes(values)
+        return buf
+
 
 class UdpStreamer:
     """
@@ -33,22 +96,22 @@ class UdpStreamer:
     Total: 5 + N bytes per packet
     """
 
-    def __init__(self, config: AppConfig, state: SharedState):
+    def __init__(self, config: AppConfig, state: SharedState, send_pool: Optional[UdpSendPool] = None):
         self._config = config
         self._state = state
         self._running = False
         self._thread: Optional[threading.Thread] = None
-        self._socket: Optional[socket.socket] = None
+        # Sockets may be shared with the repeater
+        self._send_pool = send_pool or UdpSendPool(config)
+        # Only the streamer thread sends from these; send_immediate builds its own
+        self._packets = PacketBuffers()
 
     def start(self) -> None:
         """Start the UDP streamer in a background thread."""
         if self._running:
             return
 
-        # Create UDP socket
-        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-
+        self._send_pool.open()
         self._running = True
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
@@ -56,13 +119,10 @@ class UdpStreamer:
     def stop(self) -> None:
         """Stop the UDP streamer."""
         self._running = False
-        if self._socket:
-            try:
-                self._socket.close()
-            except Exception:
-                pass
         if self._thread:
             self._thread.join(timeout=5)
+            self._thread = None
+            self._send_pool.close()
 
     def _run_loop(self) -> None:
         """Main streamer loop - runs at configured rate."""
@@ -70,40 +130,53 @@ class UdpStreamer:
         interval = 1.0 / send_rate if send_rate > 0 else 0.016  # Default ~60Hz
         logger.info(f"UDP streamer started at {send_rate}Hz (interval: {interval*1000:.1f}ms)")
 
+        # Ticks follow a fixed monotonic schedule, so sleep overshoot doesn't
+        # accumulate into drift
+        interval_ns = int(interval * 1e9)
+        deadline = time.monotonic_ns()
         while self._running:
-            loop_start = time.time()
-
             try:
                 self._send_fast_updates()
             except Exception as e:
                 logger.error(f"UDP streamer error: {e}")
 
-            # Sleep for the remainder of the interval
-            elapsed = time.time() - loop_start
-            sleep_time = max(0, interval - elapsed)
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+            # Sleep until the next tick
+            deadline += interval_ns
+            sleep_ns = deadline - time.monotonic_ns()
+            if sleep_ns > 0:
+                time.sleep(sleep_ns / 1e9)
+            else:
+                # Fell behind; restart the schedule rather than bursting to catch up
+                deadline = time.monotonic_ns()
 
     def _send_fast_updates(self) -> None:
         """Send UDP packets to all devices in fast mode."""
         # Get devices in fast mode
         fast_device_ids = self._state.get_devices_by_mode(DeviceMode.FAST)
 
-        if not fast_device_ids:
+        if not fast_device_ids or not self._send_pool.socket:
             return
 
+        batch = []
         for device_id in fast_device_ids:
             try:
-                self._send_to_device(device_id)
+                message = self._device_message(device_id)
             except Exception as e:
                 logger.debug(f"Failed to send UDP to {device_id}: {e}")
                 self._state.increment_device_error(device_id)
+                continue
+            if message:
+                batch.append((device_id, *message))
+
+        for device_id, addr, e in self._send_pool.send_batch(batch):
+            logger.debug(f"Failed to send UDP to {device_id} at {addr[0]}:{addr[1]}: {e}")
+            self._state.increment_device_error(device_id)
 
-    def _send_to_device(self, device_id: str) -> None:
-        """Send a UDP packet to a single device."""
+    def _device_message(self, device_id: str) -> Optional[tuple[bytearray, tuple[str, int]]]:
+        """Build the packet for a single device, paired with its address."""
         device_config = self._config.get_device_by_id(device_id)
         if not device_config:
-            return
+            return None
 
         # Get current fast values
         values = self._state.get_fast_values(device_id)
@@ -111,15 +184,8 @@ class UdpStreamer:
             values = [0] * device_config.channels
 
         # Build packet
-        packet = self._build_packet(values)
-
-        # Send to device
-        if self._socket:
-            try:
-                self._socket.sendto(packet, (device_config.ip, device_config.udp_port))
-            except socket.error as e:
-                logger.debug(f"Socket error sending to {device_config.ip}:{device_config.udp_port}: {e}")
-                raise
+        packet = self._packets.fill(device_id, values)
+        return packet, device_config.udp_addr
 
     def _build_packet(self, values: list[int]) -> bytes:
         """
@@ -131,19 +197,7 @@ class UdpStreamer:
             Channels:   1 byte   Number of channels
             Values:     N bytes  One byte per channel
         """
-        num_channels = len(values)
-        
-        # Clamp values to 0-255
-        clamped = [max(0, min(255, v)) for v in values]
-
-        # Pack the data
-        # Header (3 bytes) + Version (1 byte) + Channel count (1 byte) + Values (N bytes)
-        packet = bytearray(PACKET_HEADER)
-        packet.append(PACKET_VERSION)
-        packet.append(num_channels)
-        packet.extend(clamped)
-
-        return bytes(packet)
+        return v1_packet_builder(len(values))(clamp_bytes(values))
 
     def build_ddp_packet(
         self,
@@ -174,24 +228,37 @@ class UdpStreamer:
             DDP packet bytes
         """
         flags = 0x41 if push else 0x01  # Push flag + version 1
-        sequence = 0  # Could implement sequence numbering
-        data_type = 0x01  # RGB data
-        dest_id = 0x01  # Default device
+        data_bytes = clamp_bytes(values)
+        return _ddp_header(flags, offset, len(data_bytes)) + data_bytes
 
-        data_bytes = bytes([max(0, min(255, v)) for v in values])
-        data_len = len(data_bytes)
-
-        # Build header
-        packet = bytearray()
-        packet.append(flags)
-        packet.append(sequence)
-        packet.append(data_type)
-        packet.append(dest_id)
-        packet.extend(struct.pack(">I", offset))  # 4 bytes, big-endian
-        packet.extend(struct.pack(">H", data_len))  # 2 bytes, big-endian
-        packet.extend(data_bytes)
+    def send_ddp(self, device_id: str, values: list[int], offset: int = 0, push: bool = True) -> bool:
+        """
+        Send a DDP packet to a device immediately.
+        
+        The cached header and the values go out as two iovecs of one
+        sendmsg, so the header is never copied into a per-packet buffer.
+        
+        Returns:
+            True if sent successfully
+        """
+        device_config = self._config.get_device_by_id(device_id)
+        sock = self._send_pool.socket
+        if not device_config or not sock:
+            return False
 
-        return bytes(packet)
+        flags = 0x41 if push else 0x01  # Push flag + version 1
+        data_bytes = clamp_bytes(values)
+        header = _ddp_header(flags, offset, len(data_bytes))
+        try:
+            if hasattr(sock, "sendmsg"):
+                sock.sendmsg((header, data_bytes), (), 0, device_config.udp_addr)
+            else:
+                # No sendmsg on Windows
+                sock.sendto(header + data_bytes, device_config.udp_addr)
+            return True
+        except socket.error as e:
+            logger.debug(f"DDP send failed to {device_id}: {e}")
+            return False
 
     def send_immediate(self, device_id: str, values: list[int]) -> bool:
         """
@@ -213,9 +280,10 @@ class UdpStreamer:
 
         packet = self._build_packet(values)
 
-        if self._socket:
+        sock = self._send_pool.socket
+        if sock:
             try:
-                self._socket.sendto(packet, (device_config.ip, device_config.udp_port))
+                sock.sendto(packet, device_config.udp_addr)
                 return True
             except socket.error as e:
                 logger.debug(f"Immediate send failed to {device_id}: {e}")
@@ -260,9 +328,9 @@ class UdpBroadcaster:
         packet = self._build_simple_packet(values)
         success_count = 0
 
-        for device in self._config.get_all_devices():
+        for addr in zip(self._config.device_ips, self._config.device_udp_ports):
             try:
-                self._socket.sendto(packet, (device.ip, device.udp_port))
+                self._socket.sendto(packet, addr)
                 success_count += 1
             except socket.error:
                 pass
@@ -271,9 +339,5 @@ class UdpBroadcaster:
 
     def _build_simple_packet(self, values: list[int]) -> bytes:
         """Build a simple UDP packet."""
-        packet = bytearray(PACKET_HEADER)
-        packet.append(PACKET_VERSION)
-        packet.append(len(values))
-        packet.extend([max(0, min(255, v)) for v in values])
-        return bytes(packet)
+        return v1_packet_builder(len(values))(clamp_bytes(values))
 